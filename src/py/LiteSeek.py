@@ -7,8 +7,33 @@
 #
 ##
 # -*- coding: utf-8 -*-
+import os
+import sys
 import re
+import time
+import mmap
+import heapq
+import struct
+import codecs
+import copy
+import inspect
+import asyncio
+import json
+import sqlite3
+import zlib
+import math
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ProcessPoolExecutor, wait, as_completed, FIRST_COMPLETED
+from contextlib import contextmanager
 from functools import cmp_to_key
+from urllib.parse import quote
+try:
+    # optional, vectorized LiteSeekMatrix
+    import numpy
+except ImportError:
+    numpy = None
 
 def NOP(*args):
     return None
@@ -21,19 +46,54 @@ class LiteSeek:
     VERSION = "1.0.0"
 
     DELIM = re.compile(r'[\s\.\?,;!:\(\)\[\]@#\$%\^&\*\-_\+<>=\/\\"\']')
+    # runs of non-delimiters, same character class as DELIM
+    WORD = re.compile('[^' + DELIM.pattern[1:-1] + ']+')
     SPACE = re.compile(r'\s+')
     ASCII = re.compile(r'^[ -~]+$')
 
     def __init__(self):
         # some defaults
         self.opts = {}
+        self._similarities = None
+        self._index_cache = None
+        self._index_cache_keys = None
+        self._queries = None
+        self._vocabularies = None
+        self._signatures = {}
         self.option('match-prefix', False)
         self.option('similarity', 0.65)
         self.option('n-gram', 2)
+        self.option('compact', False)
+        self.option('matcher', 'automaton')
+        self.option('similarity_cache', 0)
+        self.option('beam', 0)
         self.option('filter_word', None)
         self.option('normalize_word', None)
         self.option('read_index', NOP)
         self.option('store_index', NOP)
+        self.option('store_index_many', None)
+        self.option('update_index', None)
+        self.option('remove_index', None)
+        self.option('read_index_many', None)
+        self.option('index_cache', 0)
+        self.option('query_cache', 1000)
+        self.option('stats', None)
+        self.option('vocabulary', 0)
+        self.option('bloom_bits', 0)
+        self.option('store_signature', None)
+        self.option('read_signature', None)
+        self.option('deadline', 0)
+        self.option('budget', 0)
+
+    def __getstate__(self):
+        # caches are not shared with other processes
+        state = self.__dict__.copy()
+        state['_similarities'] = None
+        state['_index_cache'] = None
+        state['_index_cache_keys'] = None
+        state['_queries'] = None
+        state['_vocabularies'] = None
+        return state
 
     def option(self, *args):
         nargs = len(args)
@@ -46,139 +106,884 @@ class LiteSeek:
             self.opts[key] = val
         return self
 
-    def index(self, documentText, documentId, locale = None):
+    def index(self, documentText, documentId, locale = None, stats = None):
+        # stats (or the stats hook option) collect counters and timings, if given
+        hook = self.option('stats')
+        owner = (stats is None) and callable(hook)
+        if owner: stats = LiteSeekStats()
+        if not stats: return self._index(self.tokenize(documentText, locale), documentId, locale)
+        start = time.perf_counter()
+        tokens = list(self.tokenize(documentText, locale))
+        start = stats.time('tokenize', start)
+        documentIndex = self._index(tokens, documentId, locale)
+        stats.time('index', start)
+        stats.count('tokens', len(tokens))
+        stats.count('ngrams', len(documentIndex))
+        if owner: hook(stats, 'index')
+        return documentIndex
+
+    async def index_async(self, documentText, documentId, locale = None):
+        # same as index, store_index may be a coroutine
+        documentIndex = self._index(self.tokenize(documentText, locale), None, locale)
+        if documentId:
+            await resolve(self.option('store_index')(documentId, documentIndex, locale))
+            await resolve(self._sign(documentId, documentIndex, locale))
+            self.invalidate(documentId, locale)
+        return documentIndex
+
+    def index_stream(self, stream, documentId, locale = None, chunk_size = 65536):
+        # index a file object or an iterable of text chunks without loading it all in memory
+        return self._index(self._tokenize(self._words_stream(stream, chunk_size), locale), documentId, locale)
+
+    def update(self, documentId, documentText, locale = None):
+        # re-index document, if update_index is given and read_index(documentId, None, locale)
+        # returns the old index, only the changed n-gram postings are stored
+        tokens = list(self.tokenize(documentText, locale))
+        documentIndex = self._index(tokens, None, locale)
+        update_index = self.option('update_index')
+        old = self.option('read_index')(documentId, None, locale) if callable(update_index) else None
+        if (not is_dict(old)) or isinstance(old, LiteSeekCompactIndex) or isinstance(documentIndex, LiteSeekCompactIndex):
+            self.option('store_index')(documentId, documentIndex, locale)
+        else:
+            changed = self._changed(old, tokens, documentIndex)
+            if changed: update_index(documentId, changed, locale)
+        self._sign(documentId, documentIndex, locale)
+        self.invalidate(documentId, locale)
+        return documentIndex
+
+    def remove(self, documentId, locale = None):
+        remove_index = self.option('remove_index')
+        if callable(remove_index):
+            remove_index(documentId, locale)
+        else:
+            self.option('store_index')(documentId, {}, locale)
+        self._sign(documentId, None, locale)
+        self.invalidate(documentId, locale)
+        return self
+
+    def _changed(self, old, tokens, documentIndex):
+        # diff old and new token streams,
+        # postings of n-grams of changed words (and of shifted tail words) that differ
+        N = self.option('n-gram')
+        entries = {}
+        for key in old:
+            for entry in old[key]: entries[entry[0]] = entry
+        old_tokens = [entries[k] for k in sorted(entries.keys())]
+        n = len(old_tokens)
+        m = len(tokens)
+        same = lambda a, b, dorder, dpos: (a[1] == b[1]) and (a[3] == b[3]) and (a[0]+dorder == b[0]) and (a[2]+dpos == b[2])
+        prefix = 0
+        while (prefix < n) and (prefix < m) and same(old_tokens[prefix], tokens[prefix], 0, 0): prefix += 1
+        suffix = 0
+        dorder = m - n
+        dpos = (tokens[-1][2] - old_tokens[-1][2]) if n and m else 0
+        while (suffix < min(n, m) - prefix) and same(old_tokens[n-1-suffix], tokens[m-1-suffix], dorder, dpos): suffix += 1
+        if (0 == dorder) and (0 == dpos):
+            affected = old_tokens[prefix:n-suffix] + tokens[prefix:m-suffix]
+        else:
+            # tail order / pos shifted
+            affected = old_tokens[prefix:] + tokens[prefix:]
+        keys = {}
+        for entry in affected:
+            if entry[1] not in keys: keys[entry[1]] = self._ngram(entry[1], N)
+        changed = {}
+        for w in keys:
+            for key in keys[w]:
+                if key in changed: continue
+                postings = documentIndex[key] if key in documentIndex else []
+                if (postings or (key in old)) and ((key not in old) or (list(map(list, old[key])) != postings)):
+                    changed[key] = postings
+        return changed
+
+    def index_many(self, documents, workers = None, batch_size = 100):
+        # index (documentId, documentText[, locale]) items in a process pool,
+        # batches of (documentId, documentIndex, locale) are stored as they complete
+        # via store_index_many (or store_index per document)
+        executor = workers if hasattr(workers, 'submit') else None
+        if not executor: workers = int(workers) if workers else (os.cpu_count() or 1)
+        batch_size = max(1, int(batch_size))
+        batches = chunked(((doc[0], doc[1], doc[2] if 2 < len(doc) else None) for doc in documents), batch_size)
+        count = 0
+        if (not executor) and (2 > workers):
+            for batch in batches:
+                count += self._store_many([(documentId, self.index(documentText, None, locale), locale) for documentId, documentText, locale in batch])
+            return count
+
+        # workers only tokenize, only the tokenizer options are shipped to them (no stores, hooks or signatures)
+        indexer = self.__class__()
+        for key in ('n-gram', 'compact', 'filter_word', 'normalize_word'): indexer.option(key, self.option(key))
+        pool = executor if executor else ProcessPoolExecutor(max_workers=workers)
+        try:
+            pending = set()
+            inflight = 2*(workers if not executor else (os.cpu_count() or 1))
+            for batch in batches:
+                pending.add(pool.submit(index_batch, (indexer, batch)))
+                if len(pending) >= inflight:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done: count += self._store_many(future.result())
+            for future in as_completed(pending): count += self._store_many(future.result())
+        finally:
+            if not executor: pool.shutdown()
+        return count
+
+    def _store_many(self, batch):
+        store_index_many = self.option('store_index_many')
+        if callable(store_index_many):
+            store_index_many(batch)
+        else:
+            store_index = self.option('store_index')
+            for documentId, documentIndex, locale in batch: store_index(documentId, documentIndex, locale)
+        for documentId, documentIndex, locale in batch:
+            self._sign(documentId, documentIndex, locale)
+            self.invalidate(documentId, locale)
+        return len(batch)
+
+    def _sign(self, documentId, documentIndex, locale = None):
+        # store bloom signature of document n-grams (remove it if no index)
+        bits = self.option('bloom_bits')
+        if not bits: return None
+        signature = LiteSeekBloom.from_index(documentIndex, bits) if documentIndex is not None else None
+        store_signature = self.option('store_signature')
+        if callable(store_signature):
+            return store_signature(documentId, signature.to_bytes() if signature else None, locale)
+        if signature:
+            self._signatures[(documentId, locale)] = signature
+        elif (documentId, locale) in self._signatures:
+            del self._signatures[(documentId, locale)]
+        return None
+
+    def _signature(self, document, locale = None, signature = NOP):
+        # signature already read (eg awaited) may be given
+        read_signature = self.option('read_signature')
+        if callable(read_signature):
+            if signature is NOP: signature = read_signature(document, locale)
+            # stored as bytes
+            return LiteSeekBloom.from_bytes(signature) if signature and not isinstance(signature, LiteSeekBloom) else signature
+        return self._signatures[(document, locale)] if (document, locale) in self._signatures else None
+
+    def _may_match(self, document, requirements, locale = None, stats = None, signature = NOP):
+        # q-gram lemma on signature of document, true if document has no signature
+        signature = self._signature(document, locale, signature)
+        if signature is None: return True
+        for ngram, need in requirements:
+            # false positives only, a present n-gram is never missed
+            present = 0
+            for key in ngram:
+                if signature.has(key): present += 1
+            if present < need:
+                if stats: stats.count('rejected')
+                return False
+        return True
+
+    def tokenize(self, documentText, locale = None):
+        # lazily yield (order, word, pos in text, len) of each indexable word
+        return self._tokenize(((m.group(), m.start()) for m in LiteSeek.WORD.finditer(str(documentText))), locale)
+
+    def _index(self, tokens, documentId, locale = None):
+        N = self.option('n-gram')
+        ngrams = {}
+        if self.option('compact'):
+            documentIndex = LiteSeekCompactIndex()
+            ids = {}
+            for p, w, j, n in tokens:
+                if w not in ids:
+                    ids[w] = len(documentIndex.vocabulary)
+                    documentIndex.vocabulary.append(w)
+                    ngrams[w] = self._ngram(w, N)
+                documentIndex.words.append(ids[w])
+                documentIndex.pos.append(j)
+                documentIndex.len.append(n)
+                for k in ngrams[w]:
+                    if k not in documentIndex:
+                        documentIndex[k] = array('I')
+                    documentIndex[k].append(p)
+            if documentId:
+                self.option('store_index')(documentId, documentIndex, locale)
+                self._sign(documentId, documentIndex, locale)
+                self.invalidate(documentId, locale)
+            return documentIndex
+        documentIndex = {}
+        for entry in tokens:
+            w = entry[1]
+            if w not in ngrams: ngrams[w] = self._ngram(w, N)
+            entry = list(entry)
+            for k in ngrams[w]:
+                if k not in documentIndex:
+                    documentIndex[k] = []
+                #                      order, word, pos in text, len
+                documentIndex[k].append(entry)
+        if documentId:
+            self.option('store_index')(documentId, documentIndex, locale)
+            self._sign(documentId, documentIndex, locale)
+            self.invalidate(documentId, locale)
+        return documentIndex
+
+    def _tokenize(self, words, locale = None):
         filter_word = self.option('filter_word')
         normalize_word = self.option('normalize_word')
         if not callable(filter_word): filter_word = None
         if not callable(normalize_word): normalize_word = None
-        s = str(documentText)
-        l = len(s)
-        N = self.option('n-gram')
-        documentIndex = {}
-        w = ''
-        j = 0
         p = 0
-        for i in range(l):
-            c = s[i]
-            # if delimiter bypass
-            if LiteSeek.DELIM.match(c):
-                if '' != w:
-                    if (not filter_word) or filter_word(w, locale):
-                        n = len(w)
-                        w = normalize_word(w, locale) if normalize_word else self.normalize(w, locale)
-                        ngram = self._ngram(w, N);
-                        for k in ngram:
-                            if k not in documentIndex:
-                                documentIndex[k] = []
-                            #                        order, word, pos in text, len
-                            documentIndex[k].append([p,     w,    j,           n])
-                        p += 1
-                w = ''
-            else:
-                if '' == w: j = i
-                w += c
-
-        if '' != w:
+        for w, j in words:
             if (not filter_word) or filter_word(w, locale):
-                n = len(w)
-                w = normalize_word(w, locale) if normalize_word else self.normalize(w, locale)
-                ngram = self._ngram(w, N);
-                for k in ngram:
-                    if k not in documentIndex:
-                        documentIndex[k] = []
-                    #                        order, word, pos in text, len
-                    documentIndex[k].append([p,     w,    j,           n])
+                yield (p, normalize_word(w, locale) if normalize_word else self.normalize(w, locale), j, len(w))
                 p += 1
-        if documentId:
-            self.option('store_index')(documentId, documentIndex, locale)
-        return documentIndex
 
-    def find(self, documents, query, exact = False, consecutive = False, transposed = False, locale = None):
+    def _words_stream(self, stream, chunk_size = 65536):
+        # yield (word, absolute pos) over consecutive chunks,
+        # a word touching the end of a chunk may continue in the next chunk
+        decoder = None
+        offset = 0
+        carry = ''
+        for chunk in read_chunks(stream, chunk_size):
+            if isinstance(chunk, (bytes, bytearray)):
+                if not decoder: decoder = codecs.getincrementaldecoder('utf-8')()
+                chunk = decoder.decode(chunk)
+            else:
+                chunk = str(chunk)
+            if not chunk: continue
+            text = carry + chunk
+            start = offset - len(carry)
+            offset += len(chunk)
+            last = None
+            for m in LiteSeek.WORD.finditer(text):
+                if last: yield last
+                last = (m.group(), start + m.start())
+            carry = ''
+            if last:
+                if last[1] - start + len(last[0]) == len(text):
+                    carry = last[0]
+                else:
+                    yield last
+        # raises on a truncated utf-8 sequence at end of stream
+        if decoder: decoder.decode(b'', True)
+        if carry:
+            yield (carry, offset - len(carry))
+
+    def find(self, documents, query, exact = False, consecutive = False, transposed = False, locale = None, *, limit = None, stats = None, deadline = None, budget = None):
+        # query may also be a compiled query plan, its own options are used then,
+        # stats (or the stats hook option) collect counters and timings, if given,
+        # deadline (seconds) and budget (cost) default to the deadline / budget options,
+        # once over the best results so far are returned, marked truncated
+        hook = self.option('stats')
+        owner = (stats is None) and callable(hook)
+        if owner: stats = LiteSeekStats()
+        budget = self._budget(deadline, budget)
+        if stats: start = time.perf_counter()
+        plan = self.compile(query, exact, consecutive, transposed, locale)
+        if stats: start = stats.time('compile', start)
+        locale = plan.locale
+        index = self.index(documents, None, None, stats) if is_string(documents) else None
+        corpus = isinstance(documents, LiteSeekCorpus) or isinstance(documents, LiteSeekMatrix)
+        results = LiteSeekResults()
+        if (index or corpus or (is_array(documents) and len(documents))) and len(plan.terms):
+            candidates, expand = self._candidates(documents, index, plan, stats)
+            results = self._search(candidates, plan.query, plan, plan.exact, plan.consecutive, plan.transposed, locale, limit=limit, stats=stats, expand=expand, budget=budget)
+        if owner: hook(stats, 'find')
+        return results
+
+    def _budget(self, deadline = None, budget = None):
+        # budget of a search, deadline (seconds) and cost default to the deadline / budget options
+        if deadline is None: deadline = self.option('deadline')
+        if budget is None: budget = self.option('budget')
+        return LiteSeekBudget(deadline, budget) if deadline or budget else None
+
+    def iter_find(self, documents, query, exact = False, consecutive = False, transposed = False, locale = None, *, ordered = False, stats = None, deadline = None, budget = None):
+        # generator of results of find as documents are matched,
+        # documents may also be any iterable of document ids (eg a database cursor),
+        # in document order, or if ordered in score order (same as find),
+        # a result is given as soon as no remaining document can score higher (by upper bound of score),
+        # stops once deadline / budget is over (ordered gives the results matched so far first),
+        # the generator returns True (value of StopIteration) if truncated
+        hook = self.option('stats')
+        owner = (stats is None) and callable(hook)
+        if owner: stats = LiteSeekStats()
+        budget = self._budget(deadline, budget)
+        truncated = False
+        plan = self.compile(query, exact, consecutive, transposed, locale)
+        locale = plan.locale
+        index = self.index(documents, None, None, stats) if is_string(documents) else None
+        if len(plan.terms):
+            candidates, expand = self._candidates(documents, index, plan, stats)
+            similarities = {} # shared by all documents
+
+            def match(d, document_index, upper = False):
+                if stats and not upper: stats.count('documents')
+                if budget: budget.spend(0)
+                return self._match(d, plan, plan.exact, plan.consecutive, plan.transposed, locale, document_index, similarities=similarities, stats=stats, expanded=expand(d, document_index) if expand else None, budget=budget, upper=upper)
+
+            def result(d, res):
+                if stats: stats.count('results')
+                return {
+                    'document'  : d,
+                    'query'     : plan.query,
+                    'score'     : res['score'],
+                    'marks'     : res['marks']
+                }
+
+            if not ordered:
+                try:
+                    for candidate in candidates:
+                        res = match(candidate[0], candidate[1])
+                        if -1000000 < res['score']: yield result(candidate[0], res)
+                except LiteSeekBudgetExceeded:
+                    truncated = True
+            else:
+                # documents by upper bound of score, only those that can match
+                pending = [] # min-heap of (-upper bound, document order, document, document index)
+                found = [] # min-heap of (-score, document order, result)
+                try:
+                    for i, candidate in enumerate(candidates):
+                        if 2 < len(candidate): i = candidate[2]
+                        upper = match(candidate[0], candidate[1], True)
+                        if -float('inf') < upper: pending.append((-upper, i, candidate[0], candidate[1]))
+                    heapq.heapify(pending)
+                    while pending:
+                        upper, i, d, document_index = heapq.heappop(pending)
+                        res = match(d, document_index)
+                        if -1000000 < res['score']: heapq.heappush(found, (-res['score'], i, result(d, res)))
+                        # matched results no remaining document can beat
+                        while found and ((not pending) or (found[0][0] + 1e-9 < pending[0][0])):
+                            yield heapq.heappop(found)[2]
+                except LiteSeekBudgetExceeded:
+                    truncated = True
+                while found: yield heapq.heappop(found)[2]
+        if truncated and stats: stats.count('truncated')
+        if owner: hook(stats, 'find')
+        return truncated
+
+    def _candidates(self, documents, index, plan, stats = None):
+        # (document, document index[, document order]) candidates of find
+        # and expand(document, document index) or None
+        locale = plan.locale
+        matrix = documents if isinstance(documents, LiteSeekMatrix) else None
+        corpus = matrix.corpus if matrix else (documents if isinstance(documents, LiteSeekCorpus) else None)
+        if self.option('vocabulary'):
+            # candidates from fuzzy expansion of vocabulary instead of n-gram postings
+            return self._vocabulary_candidates(corpus if matrix else documents, index, corpus, plan, stats)
+        if index:
+            return ([(documents, index)], None)
+        if corpus:
+            # only documents that can possibly match the query
+            if stats: start = time.perf_counter()
+            if matrix:
+                # ranked by n-gram overlap, with document order
+                candidates = [(d, i) for d, i in matrix.candidates(plan.requirements, locale) if (d, locale) in corpus.documents]
+            else:
+                candidates = list(enumerate(corpus.candidates(plan.requirements, locale)))
+                candidates = [(d, i) for i, d in candidates]
+            if stats:
+                stats.time('candidates', start)
+                stats.count('candidates', len(candidates))
+            return (((d, corpus.document_index(d, locale), i) for d, i in candidates), None)
+        if self.option('bloom_bits') or callable(self.option('read_signature')):
+            # documents whose signature can not match are not read
+            documents = (d for d in documents if self._may_match(d, plan.requirements, locale, stats))
+        return (((d, None) for d in documents), None)
+
+    def compile(self, query, exact = False, consecutive = False, transposed = False, locale = None, prefix = None):
+        # immutable query plan (terms, n-grams, error budgets, matchers) for find(),
+        # valid while seeker options stay the same, cached per query and options,
+        # last term matches as prefix if prefix (default match-prefix option)
+        if isinstance(query, LiteSeekQuery): return query
+        exact = bool(exact)
+        consecutive = bool(consecutive)
+        transposed = bool(transposed)
+        prefix = bool(self.option('match-prefix') if prefix is None else prefix)
+        threshold = self.option('similarity')
+        N = self.option('n-gram')
+        key = (str(query), exact, consecutive, transposed, locale, prefix, threshold, N, self.option('filter_word'), self.option('normalize_word'), self.option('matcher'))
+        cache = self._query_cache()
+        plan = cache.get(key) if cache else None
+        if plan is None:
+            terms = tuple(self._terms(query, locale))
+            errors = tuple(round((1-threshold)*len(term)) for term in terms)
+            Matcher = self._matcher()
+            plan = LiteSeekQuery(
+                query,
+                terms,
+                tuple(tuple(self._ngram(term, N)) for term in terms),
+                errors,
+                tuple(self._requirements(terms, exact, transposed, prefix)),
+                # no fuzzy matching in exact mode
+                tuple(Matcher(term, e) for term, e in zip(terms, errors)) if not exact else tuple(),
+                exact,
+                consecutive,
+                transposed,
+                locale,
+                prefix
+            )
+            if cache: cache.set(key, plan)
+        return plan
+
+    def _vocabulary_candidates(self, documents, index, corpus, plan, stats = None):
+        # (document, document index) candidates and expand(document, document index)
+        # giving per term [(entry, similarity)] of matching words in document (None if no vocabulary)
+        locale = plan.locale
+        if corpus:
+            expansions = self._expansions(plan, corpus.vocabulary(), stats)
+            if plan.transposed and (1 < len(plan.terms)):
+                # words of second term must be present, first term may pass the n-gram test only
+                candidates = corpus.vocabulary_candidates(expansions[:2], [set(corpus.candidates(plan.requirements[:1], locale)), None], locale)
+            else:
+                # words of all terms must be present
+                candidates = corpus.vocabulary_candidates(expansions, None, locale)
+            candidates = ((d, corpus.document_index(d, locale)) for d in candidates)
+            return (candidates, lambda d, document_index: expanded(expansions, (d, locale)))
+        if index:
+            expansions = self._expansions(plan, LiteSeekVocabulary.from_index(index), stats)
+            return ([(documents, index)], lambda d, document_index: expanded(expansions))
+        # whole document index (if read_index supports it), else n-gram postings are read
+        candidates = ((d, whole if is_dict(whole) else None) for d, whole in ((d, self._read_index(d, None, locale)) for d in documents))
+        return (candidates, self._vocabulary_expand(plan, stats))
+
+    def _vocabulary_expand(self, plan, stats = None):
+        # expand(document, whole document index) with cached document vocabularies
+        locale = plan.locale
+        cache = self._vocabulary_cache()
+
+        def expand(d, document_index):
+            if not is_dict(document_index): return None
+            vocabulary = cache.get((d, locale)) if cache else None
+            if vocabulary is None:
+                vocabulary = LiteSeekVocabulary.from_index(document_index)
+                if cache: cache.set((d, locale), vocabulary)
+            return expanded(self._expansions(plan, vocabulary, stats))
+
+        return expand
+
+    def _expansions(self, plan, vocabulary, stats = None):
+        # per term [(word, similarity, value)] of vocabulary words matching term,
+        # only words with an n-gram of term (or starting with a prefix term shorter than n-gram)
+        # are matched, same as the n-gram postings without vocabulary
+        threshold = self.option('similarity')
+        N = self.option('n-gram')
+        last = len(plan.terms) - 1
+        expansions = []
+        for i, term in enumerate(plan.terms):
+            n = len(term)
+            prefix = plan.prefix and (i == last)
+            ngram = plan.ngrams[i]
+            has_ngram = (lambda word: any(key.startswith(term) for key in self._ngram(word, N))) if prefix and (n < N) else (lambda word: any(key in ngram for key in self._ngram(word, N)))
+            words = vocabulary.expand(term, 0 if plan.exact else plan.errors[i], prefix)
+            expansions.append([(word, (1 - d/n) if d else 1, value) for word, d, value in words if (threshold <= 1 - d/n) and has_ngram(word)])
+            if stats: stats.count('expanded_words', len(expansions[-1]))
+        return expansions
+
+    def _vocabulary_cache(self):
+        size = self.option('vocabulary')
+        if not size: return None
+        # True caches 1000 document vocabularies
+        size = 1000 if size is True else int(size)
+        if self._vocabularies is None: self._vocabularies = LiteSeekLRU(size)
+        self._vocabularies.maxsize = size
+        return self._vocabularies
+
+    def session(self, documents, exact = False, consecutive = False, transposed = False, locale = None, limit = None):
+        # search-as-you-type session over documents, see LiteSeekSession
+        return LiteSeekSession(self, documents, exact, consecutive, transposed, locale, limit)
+
+    def find_many(self, documents, queries, exact = False, consecutive = False, transposed = False, locale = None, *, limit = None, deadline = None, budget = None):
+        # results of each query, same as find(documents, query, ..) for each,
+        # documents are indexed / read once and queries with same terms are matched once,
+        # deadline / budget is shared by all queries
+        queries = list(queries)
+        budget = self._budget(deadline, budget)
         index = self.index(documents, None) if is_string(documents) else None
-        results = []
-        if index or (is_array(documents) and len(documents)):
-            exact = bool(exact)
-            consecutive = bool(consecutive)
-            transposed = bool(transposed)
-
-            words = list(filter(
-                lambda s: 0 < len(s),
-                re.split(
-                    LiteSeek.SPACE,
-                    # strip delimiters ..
-                    re.sub(
-                        LiteSeek.DELIM,
-                        ' ',
-                        str(query)
-                    ).strip()
-                )
-            ))
-            terms = []
-
-            filter_word = self.option('filter_word')
-            normalize_word = self.option('normalize_word')
-            if not callable(filter_word): filter_word = None
-            if not callable(normalize_word): normalize_word = None
-
-            for word in words:
-                if filter_word and not filter_word(word, locale):
-                    continue
-                terms.append(normalize_word(word, locale) if normalize_word else self.normalize(word, locale))
-
-            if not len(terms): return results
-
-            t = -1000000
-
-            if index:
-                res = self._match(None, terms, exact, consecutive, transposed, locale, index)
-                if t < res['score']:
-                    results.append({
-                        'document'  : documents,
-                        'query'     : query,
-                        'score'     : res['score'],
-                        'marks'     : res['marks']
-                    })
+        matrix = documents if isinstance(documents, LiteSeekMatrix) else None
+        corpus = matrix.corpus if matrix else (documents if isinstance(documents, LiteSeekCorpus) else None)
+        if not (index or corpus or (is_array(documents) and len(documents))): return [LiteSeekResults() for query in queries]
+
+        # group queries by terms
+        groups = {}
+        plans = []
+        for qi, query in enumerate(queries):
+            plan = self.compile(query, exact, consecutive, transposed, locale)
+            if plan.terms:
+                key = (plan.terms, plan.exact, plan.consecutive, plan.transposed, plan.locale, plan.prefix)
+                if key not in groups:
+                    groups[key] = []
+                    plans.append((plan, LiteSeekCollector(None, limit)))
+                groups[key].append(qi)
+        similarities = {} # word similarities and matchers shared by all queries
+        truncated = False
+        try:
+            if index or corpus:
+                # candidates (and expansion) of each plan, same as find, matched in document order
+                candidates = []
+                for plan, collector in plans:
+                    plan_candidates, expand = self._candidates(documents, index, plan)
+                    candidates.append((dict(((candidate[0], plan.locale), candidate[1]) for candidate in plan_candidates), expand))
+                # (document, locale) in indexed order
+                order = (lambda document: 0) if index else (lambda document: corpus.order(*document))
+                for document in sorted(set().union(*[plan_candidates for plan_candidates, expand in candidates]), key=order):
+                    if budget: budget.spend(0)
+                    d = document[0]
+                    for (plan, collector), (plan_candidates, expand) in zip(plans, candidates):
+                        if document in plan_candidates:
+                            document_index = plan_candidates[document]
+                            collector.add(order(document), d, self._match(d, plan, plan.exact, plan.consecutive, plan.transposed, plan.locale, document_index, min_score=collector.min_score(), similarities=similarities, expanded=expand(d, document_index) if expand else None, budget=budget))
             else:
-                for d in documents:
-                    res = self._match(d, terms, exact, consecutive, transposed, locale, None)
-                    if t < res['score']:
-                        results.append({
-                            'document'  : d,
-                            'query'     : query,
-                            'score'     : res['score'],
-                            'marks'     : res['marks']
-                        })
-
-            results = list(sorted(results, key=cmp_to_key(lambda a, b: b['score'] - a['score'])))
+                vocabulary = self.option('vocabulary')
+                # documents whose signature can not match are not read (as in find)
+                signed = (not vocabulary) and (self.option('bloom_bits') or callable(self.option('read_signature')))
+                # plans per locale, with n-gram keys of their queries read once per document,
+                # whole document index if vocabulary or a plan needs it
+                locales = {}
+                plan_keys = [self._keys(plan) for plan, collector in plans]
+                expands = [self._vocabulary_expand(plan) if vocabulary else None for plan, collector in plans]
+                for p, (plan, collector) in enumerate(plans):
+                    if plan.locale not in locales: locales[plan.locale] = ([], False, [])
+                    keys, whole, positions = locales[plan.locale]
+                    for key in (plan_keys[p] or []):
+                        if key not in keys: keys.append(key)
+                    positions.append(p)
+                    locales[plan.locale] = (keys, whole or vocabulary or (plan_keys[p] is None), positions)
+                for i, d in enumerate(documents):
+                    if budget: budget.spend(0)
+                    for locale, (keys, whole, positions) in locales.items():
+                        if signed: positions = [p for p in positions if self._may_match(d, plans[p][0].requirements, locale)]
+                        if not positions: continue
+                        document_index = self._read_index(d, None, locale) if whole else None
+                        # vocabulary is expanded only if whole document index was read (as in find)
+                        read_whole = is_dict(document_index)
+                        is_whole = read_whole
+                        if not is_whole:
+                            document_index, is_whole = self._read_keys(d, keys, locale)
+                        # documents with none of the n-grams can not match
+                        if not document_index: continue
+                        for p in positions:
+                            plan, collector = plans[p]
+                            # plan needing whole document index can not match if it was not read (as in find)
+                            if (not is_whole) and (plan_keys[p] is None): continue
+                            collector.add(i, d, self._match(d, plan, plan.exact, plan.consecutive, plan.transposed, locale, document_index, min_score=collector.min_score(), similarities=similarities, expanded=expands[p](d, document_index) if expands[p] and read_whole else None, budget=budget))
+        except LiteSeekBudgetExceeded:
+            # documents not matched yet are dropped
+            truncated = True
+
+        results = [LiteSeekResults([], truncated) for query in queries]
+        for plan, collector in plans:
+            matched = collector.results()
+            for qi in groups[(plan.terms, plan.exact, plan.consecutive, plan.transposed, plan.locale, plan.prefix)]:
+                results[qi] = LiteSeekResults([{
+                    'document'  : result['document'],
+                    # query of compiled plan, as in find
+                    'query'     : queries[qi].query if isinstance(queries[qi], LiteSeekQuery) else queries[qi],
+                    'score'     : result['score'],
+                    'marks'     : result['marks']
+                } for result in matched], truncated)
+        return results
+
+    def _read_keys(self, document, keys, locale = None):
+        # (postings of keys present in document, whole) read at once if read_index_many is given,
+        # whole if read_index returned the whole document index
+        if not keys: return ({}, False)
+        if callable(self.option('read_index_many')):
+            return (dict((key, postings) for key, postings in self._read_index_many(document, keys, locale).items() if postings), False)
+        documentIndex = {}
+        for key in keys:
+            postings = self._read_index(document, key, locale)
+            if is_dict(postings): return (postings, True)
+            if postings: documentIndex[key] = postings
+        return (documentIndex, False)
+
+    async def find_async(self, documents, query, exact = False, consecutive = False, transposed = False, locale = None, *, limit = None, concurrency = 16, stats = None, window = 256, deadline = None, budget = None):
+        # same as find, read_index / read_index_many / read_signature may be coroutines,
+        # documents may also be any iterable of document ids, they are read and matched
+        # in windows of documents, postings of query n-grams in a window are prefetched concurrently
+        if is_string(documents) or isinstance(documents, LiteSeekCorpus) or isinstance(documents, LiteSeekMatrix):
+            # in memory, nothing to await
+            return self.find(documents, query, exact, consecutive, transposed, locale, limit=limit, stats=stats, deadline=deadline, budget=budget)
+        hook = self.option('stats')
+        owner = (stats is None) and callable(hook)
+        if owner: stats = LiteSeekStats()
+        budget = self._budget(deadline, budget)
+        plan = self.compile(query, exact, consecutive, transposed, locale)
+        locale = plan.locale
+        if not len(plan.terms): return LiteSeekResults()
+
+        keys = self._keys(plan)
+        read_index = self.option('read_index')
+        read_index_many = self.option('read_index_many')
+        read_signature = self.option('read_signature')
+        signed = self.option('bloom_bits') or callable(read_signature)
+        # candidates from fuzzy expansion of vocabulary instead of n-gram postings
+        expand = self._vocabulary_expand(plan, stats) if self.option('vocabulary') else None
+        cache = self.index_cache()
+        semaphore = asyncio.Semaphore(max(1, int(concurrency)))
+
+        async def read(document, key):
+            async with semaphore:
+                postings = await resolve(read_index(document, key, locale))
+            if stats:
+                stats.count('read_index')
+                if postings and not is_dict(postings): stats.count('postings', len(postings))
+            return postings
+
+        async def may_match(document):
+            # documents whose signature can not match are not read
+            if not signed: return True
+            signature = NOP
+            if callable(read_signature):
+                async with semaphore:
+                    signature = await resolve(read_signature(document, locale))
+            return self._may_match(document, plan.requirements, locale, stats, signature)
+
+        async def prefetch(document):
+            # (postings of query n-grams or whole document index, whole)
+            if not (await may_match(document)): return (None, False)
+            if cache and cache.has((document, locale, None)): return (cache.get((document, locale, None)), True)
+            if expand or (keys is None):
+                # whole document index, if read_index supports it
+                whole = await read(document, None)
+                if is_dict(whole):
+                    if cache: self._cache_index((document, locale, None), whole)
+                    return (whole, True)
+                # needed, last term matched as prefix is shorter than n-gram
+                if keys is None: return (None, False)
+            documentIndex = {}
+            missing = []
+            for key in keys:
+                postings = cache.get((document, locale, key), NOP) if cache else NOP # NOP marks missing
+                if postings is NOP:
+                    missing.append(key)
+                elif postings:
+                    documentIndex[key] = postings
+            if missing:
+                if callable(read_index_many):
+                    async with semaphore:
+                        read_many = (await resolve(read_index_many(document, missing, locale))) or {}
+                    if stats:
+                        stats.count('read_index_many')
+                        stats.count('postings', sum(len(read_many[key]) for key in read_many if read_many[key]))
+                    fetched = [read_many[key] if key in read_many else None for key in missing]
+                else:
+                    fetched = await asyncio.gather(*[read(document, key) for key in missing])
+                for key, postings in zip(missing, fetched):
+                    if is_dict(postings):
+                        # whole index returned
+                        if cache: self._cache_index((document, locale, None), postings)
+                        return (postings, True)
+                    if cache: self._cache_index((document, locale, key), postings)
+                    if postings: documentIndex[key] = postings
+            return (documentIndex, False)
+
+        collector = LiteSeekCollector(plan.query, limit)
+        similarities = {} # shared by all documents
+        if stats: start = time.perf_counter()
+        truncated = False
+        try:
+            for batch in chunked(enumerate(documents), max(1, int(window))):
+                if budget: budget.spend(0)
+                indexes = await asyncio.gather(*[prefetch(d) for i, d in batch])
+                for (i, d), (documentIndex, whole) in zip(batch, indexes):
+                    # documents with none of the query n-grams can not match
+                    if not documentIndex: continue
+                    collector.add(i, d, self._match(d, plan, plan.exact, plan.consecutive, plan.transposed, locale, documentIndex, min_score=collector.min_score(), similarities=similarities, stats=stats, expanded=expand(d, documentIndex) if expand and whole else None, budget=budget))
+                    if stats: stats.count('documents')
+        except LiteSeekBudgetExceeded:
+            # document being matched and documents not read yet are dropped
+            truncated = True
+            if stats: stats.count('truncated')
+        if stats: start = stats.time('match', start)
+        results = LiteSeekResults(collector.results(), truncated)
+        if stats:
+            stats.time('sort', start)
+            stats.count('results', len(results))
+        if owner: hook(stats, 'find')
+        return results
+
+    def find_parallel(self, documents, query, exact = False, consecutive = False, transposed = False, locale = None, *, workers = None, limit = None, deadline = None, budget = None):
+        # match shards of documents list in a process pool,
+        # seeker options (callbacks included) must be picklable,
+        # shards get the time left until deadline when they start and an equal part of budget
+        if (not is_array(documents)) or (2 > len(documents)): return self.find(documents, query, exact, consecutive, transposed, locale, limit=limit, deadline=deadline, budget=budget)
+        executor = workers if hasattr(workers, 'map') else None
+        if not executor:
+            workers = int(workers) if workers else (os.cpu_count() or 1)
+            if 2 > workers: return self.find(documents, query, exact, consecutive, transposed, locale, limit=limit, deadline=deadline, budget=budget)
+        if deadline is None: deadline = self.option('deadline')
+        if budget is None: budget = self.option('budget')
+        # wall clock, comparable across processes
+        end = (time.time() + float(deadline)) if deadline else None
+        nshards = min(len(documents), 4*((os.cpu_count() or 1) if executor else workers))
+        size = -(-len(documents) // nshards)
+        shards = [documents[i:i+size] for i in range(0, len(documents), size)]
+        if isinstance(query, LiteSeekQuery):
+            # workers compile their own plan
+            query, exact, consecutive, transposed, locale = query.query, query.exact, query.consecutive, query.transposed, query.locale
+        cost = -(-int(budget) // len(shards)) if budget else 0
+        args = [(self._shard_seeker(shard, locale), shard, query, exact, consecutive, transposed, locale, limit, end, cost) for shard in shards]
+        if executor:
+            shard_results = list(executor.map(find_shard, args))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                shard_results = list(executor.map(find_shard, args))
+        # shards are in documents order and sort is stable, same as find()
+        results = []
+        for res in shard_results: results.extend(res)
+        results = list(sorted(results, key=cmp_to_key(lambda a, b: b['score'] - a['score'])))
+        return LiteSeekResults(results[:int(limit)] if limit else results, any(res.truncated for res in shard_results))
+
+    def _shard_seeker(self, documents, locale = None):
+        # seeker shipped to a worker matching documents, only with their own signatures
+        if not self._signatures: return self
+        seeker = copy.copy(self)
+        seeker._signatures = dict(((d, locale), self._signatures[(d, locale)]) for d in documents if (d, locale) in self._signatures)
+        return seeker
+
+    def _keys(self, plan):
+        # n-gram keys of plan terms read per document,
+        # None if whole document index is needed (last term matched as prefix is shorter than n-gram)
+        if plan.prefix and plan.terms and (len(plan.terms[-1]) < self.option('n-gram')): return None
+        keys = []
+        for ngram in plan.ngrams:
+            for key in ngram:
+                if key not in keys: keys.append(key)
+        return keys
+
+    def _terms(self, query, locale = None):
+        words = list(filter(
+            lambda s: 0 < len(s),
+            re.split(
+                LiteSeek.SPACE,
+                # strip delimiters ..
+                re.sub(
+                    LiteSeek.DELIM,
+                    ' ',
+                    str(query)
+                ).strip()
+            )
+        ))
+        terms = []
+
+        filter_word = self.option('filter_word')
+        normalize_word = self.option('normalize_word')
+        if not callable(filter_word): filter_word = None
+        if not callable(normalize_word): normalize_word = None
+
+        for word in words:
+            if filter_word and not filter_word(word, locale):
+                continue
+            terms.append(normalize_word(word, locale) if normalize_word else self.normalize(word, locale))
+        return terms
+
+    def _search(self, candidates, query, terms, exact = False, consecutive = False, transposed = False, locale = None, *, limit = None, stats = None, similarities = None, shared = None, expand = None, budget = None):
+        # match (document, document index[, document order]) candidates, sorted by score,
+        # shared(document) gives the memo of document kept across calls, if given,
+        # expand(document, document index) gives the expanded terms of document, if given,
+        # stops with results so far once budget is over, if given
+        collector = LiteSeekCollector(query, limit)
+        if similarities is None: similarities = {} # shared by all documents
+        if stats: start = time.perf_counter()
+        truncated = False
+        try:
+            for i, candidate in enumerate(candidates):
+                if budget: budget.spend(0)
+                d = candidate[0]
+                document_index = candidate[1]
+                # candidates not in document order give their order
+                if 2 < len(candidate): i = candidate[2]
+                # skip documents that can not make it to the top
+                collector.add(i, d, self._match(d, terms, exact, consecutive, transposed, locale, document_index, min_score=collector.min_score(), similarities=similarities, stats=stats, shared=shared(d) if shared else None, expanded=expand(d, document_index) if expand else None, budget=budget))
+                if stats: stats.count('documents')
+        except LiteSeekBudgetExceeded:
+            # document being matched is dropped
+            truncated = True
+            if stats: stats.count('truncated')
+        if stats: start = stats.time('match', start)
+        results = LiteSeekResults(collector.results(), truncated)
+        if stats:
+            stats.time('sort', start)
+            stats.count('results', len(results))
         return results
 
-    def _match(self, document, terms, exact = False, consecutive = False, transposed = False, locale = None, document_index = None):
+    def _match(self, document, terms, exact = False, consecutive = False, transposed = False, locale = None, document_index = None, *, min_score = None, similarities = None, stats = None, shared = None, expanded = None, budget = None, upper = False):
+        # terms may also be a compiled query plan,
+        # shared keeps merged / selected postings of terms of document across calls,
+        # expanded gives per term [(entry, similarity)] of matching words instead of n-gram postings,
+        # budget is charged for posting entries, automaton steps and match states, raises once over,
+        # only the upper bound of score (-inf if no match) is returned if upper
         seeker = self
         threshold = seeker.option('similarity')
         N = seeker.option('n-gram')
+        plan = terms if isinstance(terms, LiteSeekQuery) else None
+        if plan: terms = plan.terms
         nterms = len(terms)
+        # last term matches as prefix of word
+        last = (nterms - 1) if (plan.prefix if plan else seeker.option('match-prefix')) else -1
+        Matcher = seeker._matcher()
+        if similarities is None: similarities = {}
+        if plan:
+            # matchers of plan are used
+            for term, matcher in zip(terms, plan.matchers):
+                if term not in similarities: similarities[term] = matcher
+        ngrams = plan.ngrams if plan else [seeker._ngram(term, N) for term in terms]
+        errors = plan.errors if plan else [round((1-threshold)*len(term)) for term in terms]
+        cache = seeker._similarity_cache()
         index = {} # cache
+        compact = document_index if isinstance(document_index, LiteSeekCompactIndex) else None
+
+        read_index_many = seeker.option('read_index_many')
+        if expanded is not None:
+            # orders of expanded entries
+            expanded_orders = [[entry[0] for entry, similarity in words] for words in expanded]
+        elif (not document_index) and callable(read_index_many):
+            # fetch all n-grams of query at once
+            keys = []
+            for ngram in ngrams:
+                for key in ngram:
+                    if key not in keys: keys.append(key)
+            postings = seeker._read_index_many(document, keys, locale)
+            for key in keys: index[key] = postings[key] if key in postings else None
+            if stats:
+                stats.count('read_index_many')
+                stats.count('postings', sum(len(postings[key]) for key in postings if postings[key]))
 
         def get_index(key):
             nonlocal index
             nonlocal document_index
+            nonlocal compact
             if document_index:
                 return document_index[key] if key in document_index else None
             elif index and (key in index):
                 return index[key]
             else:
-                read_index = seeker.option('read_index')(document, key, locale)
+                read_index = seeker._read_index(document, key, locale)
+                if stats:
+                    stats.count('read_index')
+                    if read_index and not is_dict(read_index): stats.count('postings', len(read_index))
                 if is_dict(read_index):
                     # whole index returned, store it
                     index = None
                     document_index = read_index
+                    if isinstance(read_index, LiteSeekCompactIndex): compact = read_index
                     return document_index[key] if key in document_index else None
                 else:
                     # index for key returned, cache it
                     index[key] = read_index
                     return read_index
 
+        def similar(term, e, word, prefix = False):
+            # memoized per query (and across queries if cache enabled)
+            key = (term, word, True) if prefix else (term, word)
+            if key in similarities: return similarities[key]
+            similarity = cache.get((Matcher, term, e) + key[1:]) if cache else None
+            if similarity is None:
+                # matcher of term is kept along (under term key)
+                if term not in similarities: similarities[term] = Matcher(term, e)
+                if budget: budget.spend(len(word))
+                similarity = match_prefix(similarities[term], word) if prefix else similarities[term].match(word)
+                if cache: cache.set((Matcher, term, e) + key[1:], similarity)
+                if stats:
+                    # characters fed to matcher, automaton may stop earlier
+                    stats.count('similarity')
+                    stats.count('automaton_steps', len(word))
+            similarities[key] = similarity
+            return similarity
+
         def merge(a, b, pos):
+            if compact: return merge_orders(a, b, pos)
             intersect = 0
             if not b:
                 ab = a
@@ -210,31 +1015,119 @@ class LiteSeek:
                     j += 1
             return (ab, intersect)
 
-        def match(i, j, j0, i2, t):
-            if i >= nterms: return None # end of match
-            best = None
-            max_score = -200000
-            term = terms[i]
-            ngram = seeker._ngram(term, N)
-            l = len(term)
-            e = round((1-threshold)*l)
+        def merge_orders(a, b, pos):
+            # same as merge for compact postings of word orders
+            intersect = 0
+            if not b:
+                ab = a
+            else:
+                ab = []
+                n = len(a)
+                m = len(b)
+                i = 0
+                j = 0
+                while j < m and b[j] < pos: j += 1
+                while i < n and j < m:
+                    if a[i] < b[j]:
+                        ab.append(a[i])
+                        i += 1
+                    elif a[i] > b[j]:
+                        ab.append(b[j])
+                        j += 1
+                    else:
+                        ab.append(a[i])
+                        i += 1
+                        j += 1
+                        intersect = 1
+                if i < n: ab.extend(a[i:])
+                if j < m: ab.extend(b[j:])
+            return (ab, intersect)
+
+        beam = int(seeker.option('beam') or 0)
+        if shared is None: shared = {'merged' : {}, 'selected' : {}}
+        merged = shared['merged'] # (term, pos, first) -> merged postings
+        selected = shared['selected'] # (term, prefix, pos, max order) -> good matches
+        memo = {} # match state -> best match
+
+        prefix_keys = None
+
+        def term_keys(i):
+            # n-gram keys of term, of last term matched as prefix shorter than n-gram
+            # the keys of whole document index starting with it
+            nonlocal prefix_keys
+            if (i != last) or (len(terms[i]) >= N): return ngrams[i]
+            if prefix_keys is None:
+                if not is_dict(document_index): get_index(None)
+                prefix_keys = [key for key in document_index if key.startswith(terms[i])] if is_dict(document_index) else []
+            return prefix_keys
+
+        def merged_postings(i, j):
             index = []
             intersections = 0
-            for key in ngram:
-                index, intersect = merge(index, get_index(key), j)
+            for key in term_keys(i):
+                postings = get_index(key)
+                if budget and postings: budget.spend(len(postings))
+                index, intersect = merge(index, postings, j)
                 intersections += intersect
-            if (not index) or (l-N-intersections > e): return False # no match
-            matcher = LiteSeek.Automaton(term, e)
-            ip = i+1 if t else i
-            for entry in index:
-                k = entry[0] # order in doc of next word
-                if consecutive and (0 < ip) and (k > j0+ip): break # consecutive and no consecutive match, stop
-                word = entry[1] # word at this point
+            return None if (not index) or (len(terms[i])-N-intersections > errors[i]) else index
 
-                # try to match this term
-                similarity = 1 if (word == term) else (0 if exact else matcher.match(word))
-                if threshold > similarity: continue # not good match
+        def candidates(i, j):
+            # merged postings of term n-grams from pos j on, None if term can not match
+            state = (terms[i], j, 0 == i)
+            if state not in merged:
+                if expanded is not None:
+                    # matching words entries from pos j on, if term passes the n-gram test (same as without vocabulary)
+                    merged[state] = expanded[i][bisect_left(expanded_orders[i], j):] if merged_postings(i, j) is not None else None
+                else:
+                    merged[state] = merged_postings(i, j)
+            return merged[state]
+
+        def select(i, j, kmax):
+            # (entry, similarity) of entries matching term, up to order kmax if consecutive
+            state = (terms[i], i == last, j, kmax)
+            if state not in selected:
+                term = terms[i]
+                e = errors[i]
+                prefix = i == last
+                good = []
+                if expanded is not None:
+                    # similarities of expanded words are known
+                    for entry, similarity in candidates(i, j):
+                        if (kmax is not None) and (entry[0] > kmax): break # consecutive and no consecutive match, stop
+                        good.append((entry, similarity))
+                else:
+                    for entry in (map(compact.entry, candidates(i, j)) if compact else candidates(i, j)):
+                        k = entry[0] # order in doc of next word
+                        if (kmax is not None) and (k > kmax): break # consecutive and no consecutive match, stop
+                        word = entry[1] # word at this point
+
+                        # try to match this term
+                        similarity = 1 if (word.startswith(term) if prefix else (word == term)) else (0 if exact else similar(term, e, word, prefix))
+                        if threshold > similarity: continue # not good match
+                        good.append((entry, similarity))
+                if beam and (len(good) > beam):
+                    # approximate, keep only best local matches (in document order)
+                    best = sorted(range(len(good)), key=lambda x: good[x][0][0] + (1 - good[x][1])*10)
+                    good = [good[x] for x in sorted(best[:beam])]
+                selected[state] = good
+            return selected[state]
+
+        def match(i, j, j0, i2, t):
+            if i >= nterms: return None # end of match
+            # each state is solved once
+            state = (i, j, j0 if consecutive else -1, i2, t)
+            if state not in memo: memo[state] = best_match(i, j, j0, i2, t)
+            return memo[state]
 
+        def best_match(i, j, j0, i2, t):
+            best = None
+            max_score = -200000
+            if budget: budget.spend(1)
+            if candidates(i, j) is None: return False # no match
+            ip = i+1 if t else i
+            kmax = j0+ip if consecutive and (0 < ip) else None
+            for entry, similarity in select(i, j, kmax):
+                k = entry[0]
                 # try to match rest terms
                 res = match(i2, k+1, k if 0 == i else j0, max(i, i2)+1, 0)
                 if res is not False:
@@ -252,26 +1145,9 @@ class LiteSeek:
                             'marks' : marks
                         }
             if transposed and (not t) and (i2 < nterms):
-                term = terms[i2]
-                ngram = seeker._ngram(term, N)
-                l = len(term)
-                e = round((1-threshold)*l)
-                index = []
-                intersections = 0
-                for key in ngram:
-                    index, intersect = merge(index, get_index(key), j)
-                    intersections += intersect
-                if (not index) or (l-N-intersections > e): return False # no match
-                matcher = LiteSeek.Automaton(term, e)
-                for entry in index:
-                    k = entry[0] # order in doc of next word
-                    if consecutive and (0 < ip) and (k > j0+ip): break # consecutive and no consecutive match, stop
-                    word = entry[1] # word at this point
-
-                    # try to match this term
-                    similarity = 1 if (word == term) else (0 if exact else matcher.match(word))
-                    if threshold > similarity: continue # not good match
-
+                if candidates(i2, j) is None: return False # no match
+                for entry, similarity in select(i2, j, kmax):
+                    k = entry[0]
                     # try to match rest terms with transposition
                     res = match(i, k+1, k if 0 == i else j0, max(i, i2)+1, 1)
                     if res is not False:
@@ -290,10 +1166,177 @@ class LiteSeek:
                             }
             return False if (0 < i) and not best else best
 
+        def term_bound(i):
+            # (min order, min penalty) of matching term in document
+            term = terms[i]
+            if expanded is not None:
+                if not expanded[i]: return (0, 0)
+                return (expanded[i][0][0][0], min((1 - similarity)*10 for entry, similarity in expanded[i]))
+            k0 = None
+            shortest = None
+            for key in term_keys(i):
+                postings = get_index(key)
+                if not postings: continue
+                k = postings[0] if compact else postings[0][0]
+                if (k0 is None) or (k < k0): k0 = k
+                if (shortest is None) or (len(postings) < len(shortest)): shortest = postings
+            if k0 is None: return (0, 0)
+            # exact occurrence (or prefix) has no penalty, else at least one edit
+            for entry in (map(compact.entry, shortest) if compact else shortest):
+                if entry[1].startswith(term) if i == last else (term == entry[1]): return (k0, 0)
+            return (k0, float('inf') if exact else 10/len(term))
+
+        def bound():
+            # upper bound of score from n-gram postings only,
+            # score = sum(j - k) - penalties <= -1 - (order of first matched word) - penalties
+            if expanded is not None:
+                # necessary terms have matching words,
+                # with transposition only second term (first may pass the n-gram test only)
+                for i in ([1] if transposed and (1 < nterms) else range(nterms)):
+                    if not expanded[i]: return -float('inf')
+            else:
+                for ngram, need in (plan.requirements if plan else seeker._requirements(terms, exact, transposed, 0 <= last)):
+                    present = 0
+                    for key in ngram:
+                        if get_index(key): present += 1
+                    if present < need: return -float('inf')
+            if transposed and (1 < nterms):
+                k0, p0 = term_bound(0)
+                k1, p1 = term_bound(1)
+                # either first term matched or second term matched first with transposition
+                return -1 - min(k0, k1) - p1 - min(p0, 1)
+            k0, p = term_bound(0)
+            for i in range(1, nterms): p += term_bound(i)[1]
+            return -1 - k0 - p
+
+        if upper: return bound()
+
+        if (min_score is not None) and (bound() + 1e-9 <= min_score):
+            if stats: stats.count('pruned')
+            return {'score' : -2000000, 'marks' : []}
+
         res = match(0, -1, -1, 1, 0)
+        if stats:
+            stats.count('match_states', len(memo))
+            stats.count('merged_postings', sum(len(postings) for postings in merged.values() if postings))
+            # each nested match advances i2 by one term
+            if memo: stats.peak('match_depth', max(state[3] for state in memo))
         return res if res else {'score' : -2000000, 'marks' : []}
 
-    def _ngram(self, s, n):
+    def index_cache(self):
+        # cross-query cache of read_index postings, size in approximate bytes
+        budget = self.option('index_cache')
+        if not budget: return None
+        if self._index_cache is None:
+            self._index_cache = LiteSeekLRU(int(budget), sizeof_index, self._evicted)
+            self._index_cache_keys = {}
+        self._index_cache.maxsize = int(budget)
+        return self._index_cache
+
+    def invalidate(self, documentId = None, locale = None):
+        # drop cached postings of document (or all)
+        if self._index_cache is not None:
+            if documentId is None:
+                self._index_cache.clear()
+                self._index_cache_keys = {}
+            elif (documentId, locale) in self._index_cache_keys:
+                for key in self._index_cache_keys.pop((documentId, locale)):
+                    self._index_cache.delete(key)
+        if self._vocabularies is not None:
+            if documentId is None:
+                self._vocabularies.clear()
+            else:
+                self._vocabularies.delete((documentId, locale))
+        return self
+
+    def _evicted(self, key, value):
+        keys = self._index_cache_keys[key[:2]] if key[:2] in self._index_cache_keys else None
+        if keys is not None:
+            keys.discard(key)
+            if not keys: del self._index_cache_keys[key[:2]]
+
+    def _cache_index(self, key, postings):
+        self._index_cache.set(key, postings)
+        if self._index_cache.has(key):
+            if key[:2] not in self._index_cache_keys: self._index_cache_keys[key[:2]] = set()
+            self._index_cache_keys[key[:2]].add(key)
+
+    def _read_index(self, document, key, locale = None):
+        cache = self.index_cache()
+        if not cache: return self.option('read_index')(document, key, locale)
+        # whole document index cached
+        whole = (document, locale, None)
+        if cache.has(whole): return cache.get(whole)
+        postings = cache.get((document, locale, key), NOP) # NOP marks missing
+        if postings is NOP:
+            postings = self.option('read_index')(document, key, locale)
+            self._cache_index(whole if is_dict(postings) else (document, locale, key), postings)
+        return postings
+
+    def _read_index_many(self, document, keys, locale = None):
+        read_index_many = self.option('read_index_many')
+        cache = self.index_cache()
+        if not cache: return read_index_many(document, keys, locale) or {}
+        postings = {}
+        missing = []
+        for key in keys:
+            p = cache.get((document, locale, key), NOP)
+            if p is NOP:
+                missing.append(key)
+            else:
+                postings[key] = p
+        if missing:
+            read = read_index_many(document, missing, locale) or {}
+            for key in missing:
+                postings[key] = read[key] if key in read else None
+                self._cache_index((document, locale, key), postings[key])
+        return postings
+
+    def _query_cache(self):
+        size = self.option('query_cache')
+        if not size: return None
+        if self._queries is None: self._queries = LiteSeekLRU(int(size))
+        self._queries.maxsize = int(size)
+        return self._queries
+
+    def _similarity_cache(self):
+        size = self.option('similarity_cache')
+        if not size: return None
+        if self._similarities is None: self._similarities = LiteSeekLRU(int(size))
+        self._similarities.maxsize = int(size)
+        return self._similarities
+
+    def _matcher(self):
+        # fuzzy word matcher class or factory(term, max errors)
+        matcher = self.option('matcher')
+        if callable(matcher): return matcher
+        return LiteSeek.BitAutomaton if 'bitparallel' == matcher else LiteSeek.Automaton
+
+    def _requirements(self, terms, exact = False, transposed = False, prefix = False):
+        # n-grams a document must contain for _match to possibly succeed,
+        # as [(ngram, min number of distinct ngram keys present)] per necessary term
+        threshold = self.option('similarity')
+        N = self.option('n-gram')
+        nterms = len(terms)
+        requirements = []
+        for i, term in enumerate(terms):
+            # with transposition a match can end after the first two terms,
+            # the first of which may only pass the n-gram test
+            if transposed and (1 < i): break
+            ngram = LiteSeek._ngram(term, N)
+            l = len(term)
+            if prefix and (i == nterms-1) and (l < N):
+                # last term matched as prefix, shorter than n-gram, is in keys starting with it, none required
+                requirements.append((ngram, 0))
+                continue
+            e = round((1-threshold)*l)
+            need = max(1, l-N+1-e)
+            if exact and not (transposed and (0 == i) and (1 < nterms)): need = max(need, len(ngram))
+            requirements.append((ngram, need))
+        return requirements
+
+    @staticmethod
+    def _ngram(s, n):
         c = max(1, len(s) - n + 1)
         ngram = {}
         for i in range(c):
@@ -306,357 +1349,250 @@ class LiteSeek:
         return self.normalizeAccents(string.lower(), locale)
 
     def normalizeAccents(self, string, locale = None):
-        # normalize some common utf8 character accents
-        # Adapted from WordPress
-        # https://github.com/WordPress/WordPress/blob/master/wp-includes/formatting.php
+        # normalize some common utf8 character accents (see ACCENTS below)
         if LiteSeek.ASCII.match(string): return string
 
-        map_ = {
-            # Decompositions for Latin-1 Supplement
-            'ª' : 'a',
-            'º' : 'o',
-            'À' : 'A',
-            'Á' : 'A',
-            'Â' : 'A',
-            'Ã' : 'A',
-            'Ä' : 'A',
-            'Å' : 'A',
-            'Ç' : 'C',
-            'È' : 'E',
-            'É' : 'E',
-            'Ê' : 'E',
-            'Ë' : 'E',
-            'Ì' : 'I',
-            'Í' : 'I',
-            'Î' : 'I',
-            'Ï' : 'I',
-            'Ð' : 'D',
-            'Ñ' : 'N',
-            'Ò' : 'O',
-            'Ó' : 'O',
-            'Ô' : 'O',
-            'Õ' : 'O',
-            'Ö' : 'O',
-            'Ù' : 'U',
-            'Ú' : 'U',
-            'Û' : 'U',
-            'Ü' : 'U',
-            'Ý' : 'Y',
-            'ß' : 's',
-            'à' : 'a',
-            'á' : 'a',
-            'â' : 'a',
-            'ã' : 'a',
-            'ä' : 'a',
-            'å' : 'a',
-            'ç' : 'c',
-            'è' : 'e',
-            'é' : 'e',
-            'ê' : 'e',
-            'ë' : 'e',
-            'ì' : 'i',
-            'í' : 'i',
-            'î' : 'i',
-            'ï' : 'i',
-            'ð' : 'd',
-            'ñ' : 'n',
-            'ò' : 'o',
-            'ó' : 'o',
-            'ô' : 'o',
-            'õ' : 'o',
-            'ö' : 'o',
-            'ø' : 'o',
-            'ù' : 'u',
-            'ú' : 'u',
-            'û' : 'u',
-            'ü' : 'u',
-            'ý' : 'y',
-            'ÿ' : 'y',
-            'Ø' : 'O',
-            # Decompositions for Latin Extended-A
-            'Ā' : 'A',
-            'ā' : 'a',
-            'Ă' : 'A',
-            'ă' : 'a',
-            'Ą' : 'A',
-            'ą' : 'a',
-            'Ć' : 'C',
-            'ć' : 'c',
-            'Ĉ' : 'C',
-            'ĉ' : 'c',
-            'Ċ' : 'C',
-            'ċ' : 'c',
-            'Č' : 'C',
-            'č' : 'c',
-            'Ď' : 'D',
-            'ď' : 'd',
-            'Đ' : 'D',
-            'đ' : 'd',
-            'Ē' : 'E',
-            'ē' : 'e',
-            'Ĕ' : 'E',
-            'ĕ' : 'e',
-            'Ė' : 'E',
-            'ė' : 'e',
-            'Ę' : 'E',
-            'ę' : 'e',
-            'Ě' : 'E',
-            'ě' : 'e',
-            'Ĝ' : 'G',
-            'ĝ' : 'g',
-            'Ğ' : 'G',
-            'ğ' : 'g',
-            'Ġ' : 'G',
-            'ġ' : 'g',
-            'Ģ' : 'G',
-            'ģ' : 'g',
-            'Ĥ' : 'H',
-            'ĥ' : 'h',
-            'Ħ' : 'H',
-            'ħ' : 'h',
-            'Ĩ' : 'I',
-            'ĩ' : 'i',
-            'Ī' : 'I',
-            'ī' : 'i',
-            'Ĭ' : 'I',
-            'ĭ' : 'i',
-            'Į' : 'I',
-            'į' : 'i',
-            'İ' : 'I',
-            'ı' : 'i',
-            'Ĵ' : 'J',
-            'ĵ' : 'j',
-            'Ķ' : 'K',
-            'ķ' : 'k',
-            'ĸ' : 'k',
-            'Ĺ' : 'L',
-            'ĺ' : 'l',
-            'Ļ' : 'L',
-            'ļ' : 'l',
-            'Ľ' : 'L',
-            'ľ' : 'l',
-            'Ŀ' : 'L',
-            'ŀ' : 'l',
-            'Ł' : 'L',
-            'ł' : 'l',
-            'Ń' : 'N',
-            'ń' : 'n',
-            'Ņ' : 'N',
-            'ņ' : 'n',
-            'Ň' : 'N',
-            'ň' : 'n',
-            'ŉ' : 'n',
-            'Ŋ' : 'N',
-            'ŋ' : 'n',
-            'Ō' : 'O',
-            'ō' : 'o',
-            'Ŏ' : 'O',
-            'ŏ' : 'o',
-            'Ő' : 'O',
-            'ő' : 'o',
-            'Ŕ' : 'R',
-            'ŕ' : 'r',
-            'Ŗ' : 'R',
-            'ŗ' : 'r',
-            'Ř' : 'R',
-            'ř' : 'r',
-            'Ś' : 'S',
-            'ś' : 's',
-            'Ŝ' : 'S',
-            'ŝ' : 's',
-            'Ş' : 'S',
-            'ş' : 's',
-            'Š' : 'S',
-            'š' : 's',
-            'Ţ' : 'T',
-            'ţ' : 't',
-            'Ť' : 'T',
-            'ť' : 't',
-            'Ŧ' : 'T',
-            'ŧ' : 't',
-            'Ũ' : 'U',
-            'ũ' : 'u',
-            'Ū' : 'U',
-            'ū' : 'u',
-            'Ŭ' : 'U',
-            'ŭ' : 'u',
-            'Ů' : 'U',
-            'ů' : 'u',
-            'Ű' : 'U',
-            'ű' : 'u',
-            'Ų' : 'U',
-            'ų' : 'u',
-            'Ŵ' : 'W',
-            'ŵ' : 'w',
-            'Ŷ' : 'Y',
-            'ŷ' : 'y',
-            'Ÿ' : 'Y',
-            'Ź' : 'Z',
-            'ź' : 'z',
-            'Ż' : 'Z',
-            'ż' : 'z',
-            'Ž' : 'Z',
-            'ž' : 'z',
-            'ſ' : 's',
-            # Decompositions for Latin Extended-B
-            'Ș' : 'S',
-            'ș' : 's',
-            'Ț' : 'T',
-            'ț' : 't',
-            # Vowels with diacritic (Vietnamese)
-            # unmarked
-            'Ơ' : 'O',
-            'ơ' : 'o',
-            'Ư' : 'U',
-            'ư' : 'u',
-            # grave accent
-            'Ầ' : 'A',
-            'ầ' : 'a',
-            'Ằ' : 'A',
-            'ằ' : 'a',
-            'Ề' : 'E',
-            'ề' : 'e',
-            'Ồ' : 'O',
-            'ồ' : 'o',
-            'Ờ' : 'O',
-            'ờ' : 'o',
-            'Ừ' : 'U',
-            'ừ' : 'u',
-            'Ỳ' : 'Y',
-            'ỳ' : 'y',
-            # hook
-            'Ả' : 'A',
-            'ả' : 'a',
-            'Ẩ' : 'A',
-            'ẩ' : 'a',
-            'Ẳ' : 'A',
-            'ẳ' : 'a',
-            'Ẻ' : 'E',
-            'ẻ' : 'e',
-            'Ể' : 'E',
-            'ể' : 'e',
-            'Ỉ' : 'I',
-            'ỉ' : 'i',
-            'Ỏ' : 'O',
-            'ỏ' : 'o',
-            'Ổ' : 'O',
-            'ổ' : 'o',
-            'Ở' : 'O',
-            'ở' : 'o',
-            'Ủ' : 'U',
-            'ủ' : 'u',
-            'Ử' : 'U',
-            'ử' : 'u',
-            'Ỷ' : 'Y',
-            'ỷ' : 'y',
-            # tilde
-            'Ẫ' : 'A',
-            'ẫ' : 'a',
-            'Ẵ' : 'A',
-            'ẵ' : 'a',
-            'Ẽ' : 'E',
-            'ẽ' : 'e',
-            'Ễ' : 'E',
-            'ễ' : 'e',
-            'Ỗ' : 'O',
-            'ỗ' : 'o',
-            'Ỡ' : 'O',
-            'ỡ' : 'o',
-            'Ữ' : 'U',
-            'ữ' : 'u',
-            'Ỹ' : 'Y',
-            'ỹ' : 'y',
-            # acute accent
-            'Ấ' : 'A',
-            'ấ' : 'a',
-            'Ắ' : 'A',
-            'ắ' : 'a',
-            'Ế' : 'E',
-            'ế' : 'e',
-            'Ố' : 'O',
-            'ố' : 'o',
-            'Ớ' : 'O',
-            'ớ' : 'o',
-            'Ứ' : 'U',
-            'ứ' : 'u',
-            # dot below
-            'Ạ' : 'A',
-            'ạ' : 'a',
-            'Ậ' : 'A',
-            'ậ' : 'a',
-            'Ặ' : 'A',
-            'ặ' : 'a',
-            'Ẹ' : 'E',
-            'ẹ' : 'e',
-            'Ệ' : 'E',
-            'ệ' : 'e',
-            'Ị' : 'I',
-            'ị' : 'i',
-            'Ọ' : 'O',
-            'ọ' : 'o',
-            'Ộ' : 'O',
-            'ộ' : 'o',
-            'Ợ' : 'O',
-            'ợ' : 'o',
-            'Ụ' : 'U',
-            'ụ' : 'u',
-            'Ự' : 'U',
-            'ự' : 'u',
-            'Ỵ' : 'Y',
-            'ỵ' : 'y',
-            # Vowels with diacritic (Chinese, Hanyu Pinyin)
-            'ɑ' : 'a',
-            # macron
-            'Ǖ' : 'U',
-            'ǖ' : 'u',
-            # acute accent
-            'Ǘ' : 'U',
-            'ǘ' : 'u',
-            # caron
-            'Ǎ' : 'A',
-            'ǎ' : 'a',
-            'Ǐ' : 'I',
-            'ǐ' : 'i',
-            'Ǒ' : 'O',
-            'ǒ' : 'o',
-            'Ǔ' : 'U',
-            'ǔ' : 'u',
-            'Ǚ' : 'U',
-            'ǚ' : 'u',
-            # grave accent
-            'Ǜ' : 'U',
-            'ǜ' : 'u',
-            # modern greek accents
-            'Ά' : 'Α',
-            'ά' : 'α',
-            'Έ' : 'Ε',
-            'έ' : 'ε',
-            'Ή' : 'Η',
-            'ή' : 'η',
-            'Ί' : 'Ι',
-            'ί' : 'ι',
-            'Ϊ' : 'Ι',
-            'ϊ' : 'ι',
-            'ΐ' : 'ι',
-            'Ό' : 'Ο',
-            'ό' : 'ο',
-            'Ύ' : 'Υ',
-            'ύ' : 'υ',
-            'Ϋ' : 'Υ',
-            'ϋ' : 'υ',
-            'ΰ' : 'υ',
-            'Ώ' : 'Ω',
-            'ώ' : 'ω',
-            'ς' : 'σ'
+        key = (locale, string)
+        normalized = _normalized.get(key)
+        if normalized is None:
+            if locale not in _accents:
+                # compile once per locale
+                _accents[locale] = (
+                    str.maketrans(ACCENTS),
+                    ACCENTS_LOCALE[locale] if locale in ACCENTS_LOCALE else None
+                )
+            table, rules = _accents[locale]
+            normalized = string.translate(table)
+            if rules:
+                for c in rules: normalized = normalized.replace(c, rules[c])
+            _normalized.set(key, normalized)
+        return normalized
+
+
+class LiteSeekQuery(namedtuple('LiteSeekQuery', ['query', 'terms', 'ngrams', 'errors', 'requirements', 'matchers', 'exact', 'consecutive', 'transposed', 'locale', 'prefix'])):
+    """
+    compiled query plan, see LiteSeek.compile
+    """
+    __slots__ = ()
+
+class LiteSeekStats:
+    """
+    counters and phase timings (in seconds) of find / index,
+    given to find(.., stats) / index(.., stats) or created per call for the stats hook option
+    """
+
+    def __init__(self):
+        self.counters = {}
+        self.timings = {}
+
+    def count(self, name, n = 1):
+        self.counters[name] = (self.counters[name] if name in self.counters else 0) + n
+        return self
+
+    def peak(self, name, value):
+        if (name not in self.counters) or (value > self.counters[name]): self.counters[name] = value
+        return self
+
+    def time(self, phase, start):
+        # add time since start to phase, return now
+        now = time.perf_counter()
+        self.timings[phase] = (self.timings[phase] if phase in self.timings else 0) + now - start
+        return now
+
+    def to_dict(self):
+        return {
+            'counters'  : dict(self.counters),
+            'timings'   : dict(self.timings)
         }
 
-        # Used for locale-specific rules
-        if 'ca' == locale:
-            map_['l·l'] = 'll'
+class LiteSeekResults(list):
+    """
+    results of find, truncated if deadline or budget was over before all documents were matched
+    """
+
+    def __init__(self, results = (), truncated = False):
+        super().__init__(results)
+        self.truncated = bool(truncated)
+
+class LiteSeekBudgetExceeded(Exception):
+    pass
+
+class LiteSeekBudget:
+    """
+    deadline (seconds from now) and cost (posting entries, automaton steps, match states) of a search,
+    spend raises LiteSeekBudgetExceeded once either is over
+    """
+
+    def __init__(self, deadline = None, cost = None):
+        self.end = (time.perf_counter() + float(deadline)) if deadline else None
+        self.cost = int(cost) if cost else None
+        self.spent = 0
+
+    def spend(self, cost = 1):
+        self.spent += cost
+        if ((self.cost is not None) and (self.spent > self.cost)) or ((self.end is not None) and (time.perf_counter() > self.end)):
+            raise LiteSeekBudgetExceeded()
+        return self
+
+class LiteSeekSession:
+    """
+    search-as-you-type over same documents, last query term matches as prefix,
+    results are same as find() with match-prefix option,
+    postings read, merged postings of terms, word similarities and per word automaton states
+    (word automaton reading the last term) are kept across keystrokes
+    """
+
+    def __init__(self, seeker, documents, exact = False, consecutive = False, transposed = False, locale = None, limit = None):
+        self.seeker = seeker
+        self.documents = documents
+        self.exact = bool(exact)
+        self.consecutive = bool(consecutive)
+        self.transposed = bool(transposed)
+        self.locale = locale
+        self.limit = limit
+        self.index = seeker.index(documents, None) if is_string(documents) else None
+        self.reset()
+
+    def reset(self):
+        self.postings = {} # document -> postings read so far (or whole index)
+        self.whole = set() # documents whose whole index was read
+        self.similarities = {}
+        self.states = {} # word -> (word automaton, term read, state)
+        self.shared = {} # document -> merged / selected postings of terms
+        return self
+
+    def find(self, query, *, stats = None, deadline = None, budget = None):
+        seeker = self.seeker
+        documents = self.documents
+        budget = seeker._budget(deadline, budget)
+        plan = seeker.compile(query, self.exact, self.consecutive, self.transposed, self.locale, True)
+        if not len(plan.terms): return LiteSeekResults()
+        if not plan.exact:
+            # last term similarities continue from previous keystroke states
+            term = plan.terms[-1]
+            self.similarities[term] = LiteSeekSessionMatcher(term, plan.errors[-1], plan.matchers[-1], self.states)
+        if self.index:
+            candidates = [(documents, self.index)]
+        elif isinstance(documents, LiteSeekMatrix):
+            # ranked by n-gram overlap, with document order
+            corpus = documents.corpus
+            candidates = ((d, corpus.document_index(d, plan.locale), i) for d, i in documents.candidates(plan.requirements, plan.locale) if (d, plan.locale) in corpus.documents)
+        elif isinstance(documents, LiteSeekCorpus):
+            candidates = ((d, documents.document_index(d, plan.locale)) for d in documents.candidates(plan.requirements, plan.locale))
+        elif is_array(documents) and len(documents):
+            keys = seeker._keys(plan)
+            # documents with none of the n-grams can not match
+            candidates = ((d, documentIndex) for d, documentIndex in ((d, self._document_index(d, keys)) for d in documents) if documentIndex)
+        else:
+            return LiteSeekResults()
+        terms = plan.terms
+        return seeker._search(candidates, plan.query, plan, plan.exact, plan.consecutive, plan.transposed, self.locale, limit=self.limit, stats=stats, similarities=self.similarities, shared=lambda d: self._shared(d, terms), budget=budget)
+
+    def _shared(self, document, terms):
+        # merged / selected postings of document, of terms still in query
+        if document not in self.shared: self.shared[document] = {'merged' : {}, 'selected' : {}, 'terms' : terms}
+        shared = self.shared[document]
+        if shared['terms'] != terms:
+            for memo in (shared['merged'], shared['selected']):
+                for key in [key for key in memo if key[0] not in terms]: del memo[key]
+            shared['terms'] = terms
+        return shared
+
+    def _document_index(self, document, keys):
+        # postings of keys (whole index if keys is None), only keys not read before are read
+        if document in self.whole: return self.postings[document]
+        if keys is None:
+            read = self.seeker._read_index(document, None, self.locale)
+            if not is_dict(read): return None
+            self.postings[document] = read
+            self.whole.add(document)
+            return read
+        if document not in self.postings: self.postings[document] = {}
+        postings = self.postings[document]
+        missing = [key for key in keys if key not in postings]
+        if missing:
+            seeker = self.seeker
+            if callable(seeker.option('read_index_many')):
+                read = seeker._read_index_many(document, missing, self.locale)
+                for key in missing: postings[key] = read[key] if key in read else None
+            else:
+                for key in missing:
+                    read = seeker._read_index(document, key, self.locale)
+                    if is_dict(read):
+                        # whole index returned
+                        self.postings[document] = read
+                        self.whole.add(document)
+                        return read
+                    postings[key] = read
+        return dict((key, postings[key]) for key in keys if postings[key])
+
+class LiteSeekSessionMatcher:
+    """
+    matcher of the last term of a session,
+    match_prefix continues the automaton of each word from the previous (shorter) term
+    """
+
+    def __init__(self, term, maxk, matcher, states):
+        self.term = term
+        self.k = maxk
+        self.matcher = matcher
+        self.states = states
 
-        for c in map_: string = map_[c].join(string.split(c))
-        return string
+    def match(self, word):
+        return self.matcher.match(word)
+
+    def match_prefix(self, word):
+        term = self.term
+        states = self.states
+        automaton, read, state = states[word] if word in states else (LiteSeekAutomaton(word, len(word)), '', None)
+        # word automaton keeps up to len(word) errors only
+        if self.k > automaton.k: return match_prefix(self.matcher, word)
+        if (state is None) or (not term.startswith(read)):
+            read = ''
+            state = automaton.initial()
+        for char in term[len(read):]:
+            if not state[0]: break # no match
+            state = automaton.transition(state, char)
+        states[word] = (automaton, term, state)
+        if not state[0]: return 0
+        # min distance of term to a prefix of word
+        d = min(state[1])
+        return (1 - d/len(term)) if d <= self.k else 0
+
+class LiteSeekCollector:
+    """
+    collects results of a query sorted by score,
+    only the top limit ones if limit is given
+    """
+
+    def __init__(self, query, limit = None):
+        self.query = query
+        self.limit = int(limit) if limit else 0
+        self.items = [] # min-heap of (score, -document order, result) when limited, else (document order, result)
+
+    def min_score(self):
+        return self.items[0][0] if self.limit and (len(self.items) >= self.limit) else None
+
+    def add(self, i, document, res):
+        if -1000000 < res['score']:
+            result = {
+                'document'  : document,
+                'query'     : self.query,
+                'score'     : res['score'],
+                'marks'     : res['marks']
+            }
+            if not self.limit:
+                self.items.append((i, result))
+            elif len(self.items) < self.limit:
+                heapq.heappush(self.items, (res['score'], -i, result))
+            elif (res['score'], -i) > self.items[0][:2]:
+                heapq.heapreplace(self.items, (res['score'], -i, result))
+        return self
 
+    def results(self):
+        if self.limit:
+            return [item[2] for item in sorted(self.items, key=lambda item: (-item[0], -item[1]))]
+        return [item[1] for item in sorted(self.items, key=lambda item: (-item[1]['score'], item[0]))]
 
 class LiteSeekAutomaton:
 
@@ -741,7 +1677,820 @@ class LiteSeekAutomaton:
             if not state[0]: return 0 # no match
         return (1 - state[1][-1]/self.n) if self.terminal(state) else 0
 
+    def match_prefix(self, word, state = None):
+        # similarity of the prefix of word closest to automaton word
+        if state is None: state = self.initial()
+        d = state[1][-1] if self.terminal(state) else None
+        for char in word:
+            state = self.transition(state, char)
+            if not state[0]: break # no better match
+            if self.terminal(state) and ((d is None) or (state[1][-1] < d)): d = state[1][-1]
+        return (1 - d/self.n) if d is not None else 0
+
+class LiteSeekCompactIndex(dict):
+    """
+    compact document index:
+    n-gram -> array of word orders,
+    word order -> word id, pos in text, len columns,
+    word id -> word (interned vocabulary)
+    read_index should return the whole compact index, postings alone can not be resolved
+    """
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.vocabulary = []
+        self.words = array('I')
+        self.pos = array('I')
+        self.len = array('I')
+
+    def entry(self, k):
+        #       order, word,                           pos in text, len
+        return (k,     self.vocabulary[self.words[k]], self.pos[k], self.len[k])
+
+    def postings(self, key):
+        return [list(self.entry(k)) for k in self[key]] if key in self else None
+
+    @staticmethod
+    def from_index(documentIndex):
+        compact = LiteSeekCompactIndex()
+        tokens = {}
+        for key in documentIndex:
+            for entry in documentIndex[key]: tokens[entry[0]] = entry
+        ids = {}
+        # orders are consecutive
+        for k in sorted(tokens.keys()):
+            w = tokens[k][1]
+            if w not in ids:
+                ids[w] = len(compact.vocabulary)
+                compact.vocabulary.append(w)
+            compact.words.append(ids[w])
+            compact.pos.append(tokens[k][2])
+            compact.len.append(tokens[k][3])
+        for key in documentIndex:
+            compact[key] = array('I', [entry[0] for entry in documentIndex[key]])
+        return compact
+
+class LiteSeekFileStore:
+    """
+    binary on-disk index files, one per document, usable as store_index / read_index pair,
+    files are memory-mapped and only postings of requested n-grams are decoded,
+    at most max_open maps are kept open and a map is re-opened if its file changed since
+
+    file layout (little-endian uint32):
+    header   : magic, version, ntokens, nwords, nkeys, words offset, tokens offset, keys offset, postings offset
+    words    : nwords+1 byte offsets followed by utf-8 words
+    tokens   : ntokens x (word id, pos in text, len), token order is its position
+    keys     : nkeys x (key offset, key length, postings start, postings count) sorted by key, followed by utf-8 keys
+    postings : word orders
+    """
+    MAGIC = b'LSKI'
+    VERSION = 1
+    HEADER = struct.Struct('<4s8I')
+    TOKEN = struct.Struct('<3I')
+    KEY = struct.Struct('<4I')
+
+    def __init__(self, directory, max_open = 128):
+        self.directory = str(directory)
+        self.max_open = max(1, int(max_open))
+        self.files = LiteSeekLRU(self.max_open, None, self._evicted) # path -> ((mmap, header, decoded words), file stamp)
+        os.makedirs(self.directory, exist_ok=True)
+
+    def path(self, documentId, locale = None):
+        # <directory>/<id>.lsi, or <directory>/<locale>.locale/<id>.lsi (quoted names have no '/')
+        name = quote(str(documentId), safe='') + '.lsi'
+        if locale: return os.path.join(self.directory, quote(str(locale), safe='') + '.locale', name)
+        return os.path.join(self.directory, name)
+
+    def store_index(self, documentId, documentIndex, locale = None):
+        compact = documentIndex if isinstance(documentIndex, LiteSeekCompactIndex) else LiteSeekCompactIndex.from_index(documentIndex)
+        words = [w.encode('utf-8') for w in compact.vocabulary]
+        word_offsets = array('I', [0])
+        for w in words: word_offsets.append(word_offsets[-1] + len(w))
+        tokens = array('I')
+        for k in range(len(compact.words)):
+            tokens.append(compact.words[k])
+            tokens.append(compact.pos[k])
+            tokens.append(compact.len[k])
+        keys = sorted((key.encode('utf-8'), key) for key in compact)
+        key_table = array('I')
+        key_blob = b''.join(k[0] for k in keys)
+        postings = array('I')
+        off = 0
+        for kb, key in keys:
+            key_table.extend((off, len(kb), len(postings), len(compact[key])))
+            off += len(kb)
+            postings.extend(compact[key])
+        words_offset = LiteSeekFileStore.HEADER.size
+        tokens_offset = align4(words_offset + 4*len(word_offsets) + word_offsets[-1])
+        keys_offset = tokens_offset + 4*len(tokens)
+        postings_offset = align4(keys_offset + 4*len(key_table) + len(key_blob))
+        if 'big' == sys.byteorder:
+            for a in (word_offsets, tokens, key_table, postings): a.byteswap()
+        path = self.path(documentId, locale)
+        self.close(path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(LiteSeekFileStore.HEADER.pack(
+                LiteSeekFileStore.MAGIC, LiteSeekFileStore.VERSION,
+                len(compact.words), len(words), len(keys),
+                words_offset, tokens_offset, keys_offset, postings_offset
+            ))
+            f.write(word_offsets.tobytes())
+            f.write(b''.join(words))
+            f.write(b'\0' * (tokens_offset - f.tell()))
+            f.write(tokens.tobytes())
+            f.write(key_table.tobytes())
+            f.write(key_blob)
+            f.write(b'\0' * (postings_offset - f.tell()))
+            f.write(postings.tobytes())
+        os.replace(tmp, path)
+        return self
+
+    def store_index_many(self, batch):
+        for documentId, documentIndex, locale in batch: self.store_index(documentId, documentIndex, locale)
+        return self
+
+    def __getstate__(self):
+        # memory maps are re-opened on demand
+        state = self.__dict__.copy()
+        state['files'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.files = LiteSeekLRU(self.max_open, None, self._evicted)
+
+    def read_index(self, document, key, locale = None):
+        # key None reads whole document index
+        f = self.open(self.path(document, locale))
+        if not f: return None
+        mm, header, words = f
+        nkeys, keys_offset = header[2], header[5]
+        blob_offset = keys_offset + nkeys*LiteSeekFileStore.KEY.size
+        if key is None:
+            documentIndex = {}
+            for i in range(nkeys):
+                ko, kl, po, pn = LiteSeekFileStore.KEY.unpack_from(mm, keys_offset + i*LiteSeekFileStore.KEY.size)
+                documentIndex[mm[blob_offset+ko:blob_offset+ko+kl].decode('utf-8')] = self.postings(f, po, pn)
+            return documentIndex
+        # binary search key in sorted keys table
+        kb = key.encode('utf-8')
+        lo = 0
+        hi = nkeys
+        while lo < hi:
+            mid = (lo + hi) >> 1
+            ko, kl, po, pn = LiteSeekFileStore.KEY.unpack_from(mm, keys_offset + mid*LiteSeekFileStore.KEY.size)
+            k = mm[blob_offset+ko:blob_offset+ko+kl]
+            if k < kb:
+                lo = mid + 1
+            elif k > kb:
+                hi = mid
+            else:
+                return self.postings(f, po, pn)
+        return None
+
+    def postings(self, f, start, count):
+        mm, header, words = f
+        ntokens, nwords, nkeys, words_offset, tokens_offset, keys_offset, postings_offset = header
+        orders = array('I', mm[postings_offset+4*start:postings_offset+4*(start+count)])
+        if 'big' == sys.byteorder: orders.byteswap()
+        postings = []
+        for order in orders:
+            w, p, n = LiteSeekFileStore.TOKEN.unpack_from(mm, tokens_offset + order*LiteSeekFileStore.TOKEN.size)
+            if w not in words:
+                wo, we = struct.unpack_from('<2I', mm, words_offset + 4*w)
+                wb = words_offset + 4*(nwords+1)
+                words[w] = mm[wb+wo:wb+we].decode('utf-8')
+            #                order, word,     pos in text, len
+            postings.append([order, words[w], p,           n])
+        return postings
+
+    def update_index(self, documentId, changedIndex, locale = None):
+        # files are immutable, rewrite with changed postings
+        documentIndex = self.read_index(documentId, None, locale) or {}
+        for key in changedIndex:
+            if changedIndex[key]:
+                documentIndex[key] = changedIndex[key]
+            elif key in documentIndex:
+                del documentIndex[key]
+        return self.store_index(documentId, documentIndex, locale)
+
+    def remove(self, documentId, locale = None):
+        path = self.path(documentId, locale)
+        self.close(path)
+        if os.path.exists(path): os.remove(path)
+        return self
+
+    def open(self, path):
+        # file may have been rewritten or removed by another store or process
+        try:
+            st = os.stat(path)
+        except OSError:
+            self.close(path)
+            return None
+        stamp = (st.st_ino, st.st_mtime_ns, st.st_size)
+        cached = self.files.get(path)
+        if cached is not None:
+            if stamp == cached[1]: return cached[0]
+            self.close(path)
+        with open(path, 'rb') as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        header = LiteSeekFileStore.HEADER.unpack_from(mm, 0)
+        if (LiteSeekFileStore.MAGIC != header[0]) or (LiteSeekFileStore.VERSION != header[1]):
+            mm.close()
+            raise ValueError('LiteSeek: invalid index file "' + path + '"')
+        # mmap, header, decoded words cache
+        f = (mm, header[2:], {})
+        self.files.set(path, (f, stamp))
+        return f
+
+    def close(self, path = None):
+        for p in ([path] if path else list(self.files.data.keys())):
+            if self.files.has(p):
+                self.files.get(p)[0][0].close()
+                self.files.delete(p)
+        return self
+
+    def _evicted(self, path, cached):
+        cached[0][0].close()
+
+class LiteSeekSQLiteStore:
+    """
+    SQLite index store, usable as store_index / read_index / read_index_many,
+    one row per (document, locale, n-gram) with postings as json
+    """
+
+    def __init__(self, path = ':memory:', table = 'liteseek_index', **kwargs):
+        self.path = str(path)
+        self.table = str(table)
+        self.kwargs = kwargs
+        self.db = sqlite3.connect(self.path, **kwargs)
+        self.batching = 0
+        # primary key of a WITHOUT ROWID table is a clustered covering index
+        self.db.execute(
+            'CREATE TABLE IF NOT EXISTS "' + self.table + '" ('
+            'document TEXT NOT NULL, '
+            'locale TEXT NOT NULL, '
+            'ngram TEXT NOT NULL, '
+            'postings TEXT NOT NULL, '
+            'PRIMARY KEY (document, locale, ngram)'
+            ') WITHOUT ROWID'
+        )
+        self.db.commit()
+
+    def __getstate__(self):
+        # connection is re-opened on unpickling (eg in worker processes),
+        # an in-memory (or temporary) database can not be shared, a copy would be a new empty database
+        if self.path in (':memory:', ''): raise TypeError('LiteSeek: can not pickle an in-memory SQLite store, use a database file')
+        state = self.__dict__.copy()
+        del state['db']
+        state['batching'] = 0
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.db = sqlite3.connect(self.path, **self.kwargs)
+
+    @contextmanager
+    def batch(self):
+        # group many store_index calls in one transaction
+        self.batching += 1
+        try:
+            yield self
+        except BaseException:
+            self.batching -= 1
+            if not self.batching: self.db.rollback()
+            raise
+        else:
+            self.batching -= 1
+            if not self.batching: self.db.commit()
+
+    def store_index(self, documentId, documentIndex, locale = None):
+        document = str(documentId)
+        locale = str(locale) if locale else ''
+        compact = documentIndex if isinstance(documentIndex, LiteSeekCompactIndex) else None
+        with self.batch():
+            self.db.execute('DELETE FROM "' + self.table + '" WHERE document=? AND locale=?', (document, locale))
+            self.db.executemany(
+                'INSERT INTO "' + self.table + '" (document, locale, ngram, postings) VALUES (?, ?, ?, ?)',
+                ((document, locale, key, json.dumps(compact.postings(key) if compact else documentIndex[key], ensure_ascii=False, separators=(',', ':'))) for key in documentIndex)
+            )
+        return self
+
+    def store_index_many(self, batch):
+        # one transaction for the whole batch
+        with self.batch():
+            for documentId, documentIndex, locale in batch: self.store_index(documentId, documentIndex, locale)
+        return self
+
+    def update_index(self, documentId, changedIndex, locale = None):
+        # only changed n-gram rows, empty postings are deleted
+        document = str(documentId)
+        locale = str(locale) if locale else ''
+        with self.batch():
+            self.db.executemany(
+                'DELETE FROM "' + self.table + '" WHERE document=? AND locale=? AND ngram=?',
+                ((document, locale, key) for key in changedIndex if not changedIndex[key])
+            )
+            self.db.executemany(
+                'INSERT OR REPLACE INTO "' + self.table + '" (document, locale, ngram, postings) VALUES (?, ?, ?, ?)',
+                ((document, locale, key, json.dumps(changedIndex[key], ensure_ascii=False, separators=(',', ':'))) for key in changedIndex if changedIndex[key])
+            )
+        return self
+
+    def read_index(self, document, key, locale = None):
+        # key None reads whole document index
+        if key is None:
+            return dict((k, json.loads(v)) for k, v in self.db.execute(
+                'SELECT ngram, postings FROM "' + self.table + '" WHERE document=? AND locale=?',
+                (str(document), str(locale) if locale else '')
+            )) or None
+        row = self.db.execute(
+            'SELECT postings FROM "' + self.table + '" WHERE document=? AND locale=? AND ngram=?',
+            (str(document), str(locale) if locale else '', key)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def read_index_many(self, document, keys, locale = None):
+        document = str(document)
+        locale = str(locale) if locale else ''
+        keys = list(keys)
+        postings = {}
+        # stay below sqlite max number of host parameters
+        for i in range(0, len(keys), 500):
+            chunk = keys[i:i+500]
+            for key, value in self.db.execute(
+                'SELECT ngram, postings FROM "' + self.table + '" WHERE document=? AND locale=? AND ngram IN (' + ','.join(['?']*len(chunk)) + ')',
+                [document, locale] + chunk
+            ):
+                postings[key] = json.loads(value)
+        return postings
+
+    def remove(self, documentId, locale = None):
+        with self.batch():
+            self.db.execute('DELETE FROM "' + self.table + '" WHERE document=? AND locale=?', (str(documentId), str(locale) if locale else ''))
+        return self
+
+    def close(self):
+        self.db.close()
+        return self
+
+class LiteSeekCorpus:
+    """
+    in-memory corpus-level inverted index:
+    n-gram -> { (documentId, locale) -> [entries] }
+    usable as store_index / read_index pair, documents are found in their own locale
+    """
+
+    def __init__(self):
+        self.index = {}
+        self.documents = {} # (documentId, locale) -> (insertion order, whole document index)
+        self.seq = 0
+        self.words = None # word -> { (documentId, locale) -> entries }, built on first use
+        self.document_words = {}
+
+    def store_index(self, documentId, documentIndex, locale = None):
+        document = (documentId, locale)
+        self.remove(documentId, locale)
+        for key in documentIndex:
+            if key not in self.index: self.index[key] = {}
+            self.index[key][document] = documentIndex[key]
+        # insertion order, whole document index
+        self.documents[document] = (self.seq, documentIndex)
+        self.seq += 1
+        if self.words is not None: self._add_words(document)
+        return self
+
+    def store_index_many(self, batch):
+        for documentId, documentIndex, locale in batch: self.store_index(documentId, documentIndex, locale)
+        return self
+
+    def read_index(self, document, key, locale = None):
+        # whole document index
+        return self.document_index(document, locale)
+
+    def update_index(self, documentId, changedIndex, locale = None):
+        document = (documentId, locale)
+        if document not in self.documents:
+            return self.store_index(documentId, dict((key, changedIndex[key]) for key in changedIndex if changedIndex[key]), locale)
+        documentIndex = self.documents[document][1]
+        for key in changedIndex:
+            postings = changedIndex[key]
+            if postings:
+                documentIndex[key] = postings
+                if key not in self.index: self.index[key] = {}
+                self.index[key][document] = postings
+            elif key in documentIndex:
+                del documentIndex[key]
+                del self.index[key][document]
+                if not self.index[key]: del self.index[key]
+        if self.words is not None:
+            self._remove_words(document)
+            self._add_words(document)
+        return self
+
+    def remove(self, documentId, locale = None):
+        document = (documentId, locale)
+        if document in self.documents:
+            for key in self.documents[document][1]:
+                postings = self.index[key]
+                del postings[document]
+                if not postings: del self.index[key]
+            del self.documents[document]
+            if self.words is not None: self._remove_words(document)
+        return self
+
+    def vocabulary(self):
+        # corpus-wide vocabulary of words (of all locales)
+        if self.words is None:
+            self.words = LiteSeekVocabulary()
+            self.document_words = {}
+            for document in self.documents: self._add_words(document)
+        return self.words
+
+    def vocabulary_candidates(self, expansions, alternatives = None, locale = None):
+        # documents of locale with matching words of every term (or in alternatives of term), in indexed order
+        candidates = None
+        for i, words in enumerate(expansions):
+            documents = set()
+            for word, similarity, value in words:
+                documents.update(d for d, l in value if (l == locale) and ((candidates is None) or (d in candidates)))
+            if alternatives and alternatives[i]:
+                documents.update(alternatives[i] if candidates is None else (d for d in alternatives[i] if d in candidates))
+            candidates = documents
+            if not candidates: return []
+        if candidates is None: return []
+        return sorted(candidates, key=lambda d: self.documents[(d, locale)][0])
+
+    def _add_words(self, document):
+        words = index_words(self.documents[document][1])
+        for word in words:
+            documents = self.words.get(word)
+            if documents is None:
+                documents = {}
+                self.words.set(word, documents)
+            documents[document] = words[word]
+        self.document_words[document] = list(words.keys())
+
+    def _remove_words(self, document):
+        if document in self.document_words:
+            for word in self.document_words.pop(document):
+                documents = self.words.get(word)
+                del documents[document]
+                if not documents: self.words.delete(word)
+
+    def document_index(self, document, locale = None):
+        return self.documents[(document, locale)][1] if (document, locale) in self.documents else None
+
+    def order(self, document, locale = None):
+        # insertion order of document
+        return self.documents[(document, locale)][0]
+
+    def candidates(self, requirements, locale = None):
+        # documents of locale, union postings of term n-grams, intersect across terms
+        candidates = None
+        for ngram, need in requirements:
+            # term without required n-grams (eg short prefix) does not filter
+            if not need: continue
+            count = {}
+            for key in ngram:
+                if key not in self.index: continue
+                for d, l in self.index[key]:
+                    if (l == locale) and ((candidates is None) or (d in candidates)):
+                        count[d] = count[d] + 1 if d in count else 1
+            candidates = set(d for d in count if count[d] >= need)
+            if not candidates: return []
+        if candidates is None: candidates = [d for d, l in self.documents if l == locale]
+        # same order as documents were indexed
+        return sorted(candidates, key=lambda d: self.documents[(d, locale)][0])
+
+class LiteSeekVocabulary:
+    """
+    trie of unique words -> value (eg entries of word),
+    fuzzy expansion walks the trie in lockstep with the automaton of a term,
+    subtrees are pruned as soon as the automaton can not match
+    """
+
+    def __init__(self):
+        self.root = {} # char -> node, None -> value of word ending here
+        self.size = 0
+
+    def set(self, word, value):
+        node = self.root
+        for c in word:
+            if c not in node: node[c] = {}
+            node = node[c]
+        if None not in node: self.size += 1
+        node[None] = value
+        return self
+
+    def get(self, word, default = None):
+        node = self.root
+        for c in word:
+            if c not in node: return default
+            node = node[c]
+        return node[None] if None in node else default
+
+    def delete(self, word):
+        path = []
+        node = self.root
+        for c in word:
+            if c not in node: return self
+            path.append((node, c))
+            node = node[c]
+        if None in node:
+            del node[None]
+            self.size -= 1
+            # remove empty nodes
+            while path and not node:
+                node, c = path.pop()
+                del node[c]
+        return self
+
+    def expand(self, term, maxk = 1, prefix = False):
+        # [(word, distance, value)] of words within maxk edits of term
+        # (a prefix of word within maxk edits if prefix)
+        automaton = LiteSeekAutomaton(term, maxk)
+        words = []
+        stack = [(self.root, '', automaton.initial(), None)]
+        while stack:
+            node, word, state, d = stack.pop()
+            if automaton.terminal(state) and ((d is None) or (state[1][-1] < d)): d = state[1][-1]
+            if None in node:
+                if prefix:
+                    if d is not None: words.append((word, d, node[None]))
+                elif automaton.terminal(state):
+                    words.append((word, state[1][-1], node[None]))
+            for c in node:
+                if c is None: continue
+                # prefix matched already, all words below match
+                next_state = automaton.transition(state, c) if state[0] else state
+                if next_state[0] or (prefix and (d is not None)): stack.append((node[c], word + c, next_state, d))
+        return words
+
+    @staticmethod
+    def from_index(documentIndex):
+        # vocabulary of document words -> entries in document order
+        vocabulary = LiteSeekVocabulary()
+        words = index_words(documentIndex)
+        for word in words: vocabulary.set(word, words[word])
+        return vocabulary
+
+class LiteSeekBloom:
+    """
+    bloom filter signature of document n-grams,
+    k bit positions from crc32 / adler32 double hashing
+    """
+
+    def __init__(self, m = 8, k = 1, bits = None):
+        self.m = max(8, int(m))
+        self.k = max(1, int(k))
+        self.bits = bytearray((self.m + 7) >> 3) if bits is None else bytearray(bits)
+
+    def positions(self, key):
+        data = key.encode('utf-8')
+        h1 = zlib.crc32(data)
+        h2 = zlib.adler32(data) | 1
+        m = self.m
+        return [(h1 + i*h2) % m for i in range(self.k)]
+
+    def add(self, key):
+        bits = self.bits
+        for i in self.positions(key): bits[i >> 3] |= 1 << (i & 7)
+        return self
+
+    def has(self, key):
+        bits = self.bits
+        for i in self.positions(key):
+            if not (bits[i >> 3] & (1 << (i & 7))): return False
+        return True
+
+    def to_bytes(self):
+        return struct.pack('<II', self.m, self.k) + bytes(self.bits)
+
+    @staticmethod
+    def from_bytes(data):
+        m, k = struct.unpack_from('<II', data, 0)
+        return LiteSeekBloom(m, k, data[8:])
+
+    @staticmethod
+    def from_index(documentIndex, bits_per_key = 10):
+        # optimal number of hashes for bits per n-gram
+        bloom = LiteSeekBloom(bits_per_key*len(documentIndex), round(bits_per_key*math.log(2)))
+        for key in documentIndex: bloom.add(key)
+        return bloom
+
+class LiteSeekMatrix:
+    """
+    sparse document x n-gram count matrix of a corpus (CSC arrays, rows in indexed order),
+    n-gram overlap of all documents with query terms is computed in one pass
+    over the n-gram columns, vectorized if numpy is available,
+    a snapshot of corpus, build again after corpus changes
+    """
+
+    def __init__(self, corpus):
+        self.corpus = corpus
+        self.documents = sorted(corpus.documents.keys(), key=lambda d: corpus.documents[d][0]) # row -> (document, locale)
+        self.rows = dict((d, r) for r, d in enumerate(self.documents)) # (document, locale) -> row
+        self.locales = {} # locale -> rows
+        for r, (d, locale) in enumerate(self.documents):
+            if locale not in self.locales: self.locales[locale] = []
+            self.locales[locale].append(r)
+        self.keys = dict((key, c) for c, key in enumerate(sorted(corpus.index.keys()))) # n-gram -> column
+        rows = self.rows
+        # column-major (CSC) arrays from corpus postings
+        col_indptr = array('I', [0])
+        col_indices = array('I')
+        col_data = array('I')
+        for key in sorted(self.keys, key=lambda key: self.keys[key]):
+            postings = corpus.index[key]
+            for r in sorted(rows[d] for d in postings):
+                col_indices.append(r)
+                col_data.append(len(postings[self.documents[r]]))
+            col_indptr.append(len(col_indices))
+        if numpy is not None:
+            self.col_indptr, self.col_indices, self.col_data = numpy.frombuffer(col_indptr, dtype=numpy.uint32), numpy.frombuffer(col_indices, dtype=numpy.uint32), numpy.frombuffer(col_data, dtype=numpy.uint32)
+        else:
+            self.col_indptr, self.col_indices, self.col_data = col_indptr, col_indices, col_data
+
+    def overlap(self, ngram):
+        # (distinct n-grams present, n-gram occurrences) per row
+        n = len(self.documents)
+        columns = [self.keys[key] for key in ngram if key in self.keys]
+        col_indptr = self.col_indptr
+        if numpy is not None:
+            if not columns: return (numpy.zeros(n, dtype=numpy.int64), numpy.zeros(n, dtype=numpy.int64))
+            rows = numpy.concatenate([self.col_indices[col_indptr[c]:col_indptr[c+1]] for c in columns])
+            counts = numpy.concatenate([self.col_data[col_indptr[c]:col_indptr[c+1]] for c in columns])
+            return (numpy.bincount(rows, minlength=n), numpy.bincount(rows, weights=counts, minlength=n).astype(numpy.int64))
+        present = [0] * n
+        occurrences = [0] * n
+        for c in columns:
+            for p in range(col_indptr[c], col_indptr[c+1]):
+                r = self.col_indices[p]
+                present[r] += 1
+                occurrences[r] += self.col_data[p]
+        return (present, occurrences)
+
+    def candidates(self, requirements, locale = None):
+        # [(document, document order)] of documents of locale with at least need n-grams of every term,
+        # most overlapping first (same documents as corpus.candidates)
+        n = len(self.documents)
+        rows = self.locales[locale] if locale in self.locales else None
+        if (not rows) or (not requirements): return []
+        if numpy is not None:
+            ok = numpy.zeros(n, dtype=bool)
+            ok[rows] = True
+            total = numpy.zeros(n, dtype=numpy.int64)
+            occurrences = numpy.zeros(n, dtype=numpy.int64)
+            for ngram, need in requirements:
+                present, count = self.overlap(ngram)
+                ok &= present >= need
+                total += present
+                occurrences += count
+            rows = numpy.flatnonzero(ok)
+            # by overlap, then occurrences, then document order
+            rows = rows[numpy.lexsort((rows, -occurrences[rows], -total[rows]))]
+            return [(self.documents[r][0], int(r)) for r in rows]
+        ok = rows
+        total = [0] * n
+        occurrences = [0] * n
+        for ngram, need in requirements:
+            present, count = self.overlap(ngram)
+            ok = set(r for r in ok if present[r] >= need)
+            if not ok: return []
+            for r in ok:
+                total[r] += present[r]
+                occurrences[r] += count[r]
+        return [(self.documents[r][0], r) for r in sorted(ok, key=lambda r: (-total[r], -occurrences[r], r))]
+
+class LiteSeekLRU:
+    """
+    bounded least-recently-used cache,
+    size is number of entries or sum of sizeof(value) if given
+    """
+
+    def __init__(self, maxsize = 1000, sizeof = None, on_evict = None):
+        self.maxsize = maxsize
+        self.sizeof = sizeof
+        self.on_evict = on_evict
+        self.data = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def has(self, key):
+        return key in self.data
+
+    def get(self, key, default = None):
+        try:
+            value = self.data[key][0]
+            self.data.move_to_end(key)
+        except KeyError:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return value
+
+    def set(self, key, value):
+        data = self.data
+        size = self.sizeof(value) if self.sizeof else 1
+        if key in data: self.size -= data[key][1]
+        data[key] = (value, size)
+        data.move_to_end(key)
+        self.size += size
+        while (self.size > self.maxsize) and data:
+            k, v = data.popitem(False)
+            self.size -= v[1]
+            if self.on_evict: self.on_evict(k, v[0])
+        return self
+
+    def delete(self, key):
+        v = self.data.pop(key, None)
+        if v: self.size -= v[1]
+        return self
+
+    def clear(self):
+        self.data.clear()
+        self.size = 0
+        return self
+
+class LiteSeekBitAutomaton:
+    """
+    bit-parallel damerau-levenshtein (restricted transpositions) matcher,
+    Myers / Hyyro algorithm with python ints as bit vectors,
+    same match(word) -> similarity as LiteSeekAutomaton
+    """
+
+    def __init__(self, word, maxk = 1):
+        self.w = str(word)
+        self.n = len(self.w)
+        self.k = min(max(int(maxk), 0), self.n)
+        self.peq = {}
+        for i, c in enumerate(self.w):
+            self.peq[c] = (self.peq[c] if c in self.peq else 0) | (1 << i)
+        self.mask = (1 << self.n) - 1
+        self.last = (1 << (self.n - 1)) if self.n else 0
+
+    def distance(self, word, prefix = False):
+        # distance to word (or to its closest prefix if prefix)
+        peq = self.peq
+        mask = self.mask
+        last = self.last
+        vp = mask
+        vn = 0
+        d = self.n
+        dmin = d
+        d0 = 0
+        pm_prev = 0
+        for c in word:
+            pm = peq[c] if c in peq else 0
+            tr = (((~d0) & pm) << 1) & pm_prev # transposition
+            d0 = ((((pm & vp) + vp) ^ vp) | pm | vn | tr) & mask
+            hp = (vn | ~(d0 | vp)) & mask
+            hn = d0 & vp
+            if hp & last: d += 1
+            elif hn & last: d -= 1
+            hp = ((hp << 1) | 1) & mask
+            hn = (hn << 1) & mask
+            vp = (hn | ~(d0 | hp)) & mask
+            vn = hp & d0
+            pm_prev = pm
+            if prefix and (d < dmin): dmin = d
+        return dmin if prefix else d
+
+    def match(self, word):
+        n = self.n
+        # distance is at least the difference in length
+        if (not n) or (abs(len(word) - n) > self.k): return 0
+        d = self.distance(word)
+        return (1 - d/n) if d <= self.k else 0
+
+    def match_prefix(self, word):
+        n = self.n
+        # a prefix of word can not be longer than word
+        if (not n) or (len(word) < n - self.k): return 0
+        d = self.distance(word, True)
+        return (1 - d/n) if d <= self.k else 0
+
+LiteSeek.Query = LiteSeekQuery
+LiteSeek.Session = LiteSeekSession
+LiteSeek.Collector = LiteSeekCollector
+LiteSeek.Results = LiteSeekResults
+LiteSeek.Budget = LiteSeekBudget
+LiteSeek.BudgetExceeded = LiteSeekBudgetExceeded
+LiteSeek.Stats = LiteSeekStats
 LiteSeek.Automaton = LiteSeekAutomaton
+LiteSeek.BitAutomaton = LiteSeekBitAutomaton
+LiteSeek.CompactIndex = LiteSeekCompactIndex
+LiteSeek.Corpus = LiteSeekCorpus
+LiteSeek.Matrix = LiteSeekMatrix
+LiteSeek.Vocabulary = LiteSeekVocabulary
+LiteSeek.Bloom = LiteSeekBloom
+LiteSeek.FileStore = LiteSeekFileStore
+LiteSeek.SQLiteStore = LiteSeekSQLiteStore
+LiteSeek.LRU = LiteSeekLRU
 
 # utils
 def is_string(x):
@@ -753,5 +2502,436 @@ def is_array(x):
 def is_dict(x):
     return isinstance(x, dict)
 
+async def resolve(value):
+    return (await value) if inspect.isawaitable(value) else value
+
+def index_batch(args):
+    seeker, batch = args
+    return [(documentId, seeker.index(documentText, None, locale), locale) for documentId, documentText, locale in batch]
+
+def chunked(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk: yield chunk
+
+def match_prefix(matcher, word):
+    # similarity of the prefix of word closest to matcher word,
+    # from match() of prefixes if matcher has no match_prefix
+    if hasattr(matcher, 'match_prefix'): return matcher.match_prefix(word)
+    return max([matcher.match(word[:p]) for p in range(1, len(word)+1)] or [0])
+
+def expanded(expansions, document = NOP):
+    # per term [(entry, similarity)] in document order of words expansions of document
+    # (word values are entries or { documentId -> entries } if document given)
+    result = []
+    for words in expansions:
+        if document is NOP:
+            entries = [(entry, similarity) for word, similarity, value in words for entry in value]
+        else:
+            entries = [(entry, similarity) for word, similarity, value in words if document in value for entry in value[document]]
+        entries.sort(key=lambda x: x[0][0])
+        result.append(entries)
+    return result
+
+def index_words(documentIndex):
+    # word -> entries of word in document order
+    compact = documentIndex if isinstance(documentIndex, LiteSeekCompactIndex) else None
+    if compact:
+        entries = (compact.entry(k) for k in range(len(compact.words)))
+    else:
+        tokens = {}
+        for key in documentIndex:
+            for entry in documentIndex[key]: tokens[entry[0]] = entry
+        entries = (tokens[k] for k in sorted(tokens.keys()))
+    words = {}
+    for entry in entries:
+        if entry[1] not in words: words[entry[1]] = []
+        words[entry[1]].append(entry)
+    return words
+
+def find_shard(args):
+    seeker, documents, query, exact, consecutive, transposed, locale, limit, end, cost = args
+    # time left of the whole search, its clock started in the calling process
+    deadline = 0
+    if end is not None:
+        deadline = end - time.time()
+        if 0 >= deadline: return LiteSeekResults([], True)
+    return seeker.find(documents, query, exact, consecutive, transposed, locale, limit=limit, deadline=deadline, budget=cost)
+
+def sizeof_index(postings):
+    # approximate memory size in bytes of postings (or whole document index)
+    if postings is None: return 16
+    if is_dict(postings): return 240 + sum(sizeof_index(postings[key]) + 64 for key in postings)
+    if isinstance(postings, array): return 64 + postings.itemsize*len(postings)
+    # list of [order, word, pos, len] entries
+    return 56 + 128*len(postings)
+
+def align4(n):
+    return (n + 3) & ~3
+
+def read_chunks(stream, chunk_size = 65536):
+    if hasattr(stream, 'read'):
+        while True:
+            chunk = stream.read(chunk_size)
+            if not chunk: break
+            yield chunk
+    else:
+        for chunk in stream: yield chunk
+
+# normalize some common utf8 character accents
+# Adapted from WordPress
+# https://github.com/WordPress/WordPress/blob/master/wp-includes/formatting.php
+ACCENTS = {
+    # Decompositions for Latin-1 Supplement
+    'ª' : 'a',
+    'º' : 'o',
+    'À' : 'A',
+    'Á' : 'A',
+    'Â' : 'A',
+    'Ã' : 'A',
+    'Ä' : 'A',
+    'Å' : 'A',
+    'Ç' : 'C',
+    'È' : 'E',
+    'É' : 'E',
+    'Ê' : 'E',
+    'Ë' : 'E',
+    'Ì' : 'I',
+    'Í' : 'I',
+    'Î' : 'I',
+    'Ï' : 'I',
+    'Ð' : 'D',
+    'Ñ' : 'N',
+    'Ò' : 'O',
+    'Ó' : 'O',
+    'Ô' : 'O',
+    'Õ' : 'O',
+    'Ö' : 'O',
+    'Ù' : 'U',
+    'Ú' : 'U',
+    'Û' : 'U',
+    'Ü' : 'U',
+    'Ý' : 'Y',
+    'ß' : 's',
+    'à' : 'a',
+    'á' : 'a',
+    'â' : 'a',
+    'ã' : 'a',
+    'ä' : 'a',
+    'å' : 'a',
+    'ç' : 'c',
+    'è' : 'e',
+    'é' : 'e',
+    'ê' : 'e',
+    'ë' : 'e',
+    'ì' : 'i',
+    'í' : 'i',
+    'î' : 'i',
+    'ï' : 'i',
+    'ð' : 'd',
+    'ñ' : 'n',
+    'ò' : 'o',
+    'ó' : 'o',
+    'ô' : 'o',
+    'õ' : 'o',
+    'ö' : 'o',
+    'ø' : 'o',
+    'ù' : 'u',
+    'ú' : 'u',
+    'û' : 'u',
+    'ü' : 'u',
+    'ý' : 'y',
+    'ÿ' : 'y',
+    'Ø' : 'O',
+    # Decompositions for Latin Extended-A
+    'Ā' : 'A',
+    'ā' : 'a',
+    'Ă' : 'A',
+    'ă' : 'a',
+    'Ą' : 'A',
+    'ą' : 'a',
+    'Ć' : 'C',
+    'ć' : 'c',
+    'Ĉ' : 'C',
+    'ĉ' : 'c',
+    'Ċ' : 'C',
+    'ċ' : 'c',
+    'Č' : 'C',
+    'č' : 'c',
+    'Ď' : 'D',
+    'ď' : 'd',
+    'Đ' : 'D',
+    'đ' : 'd',
+    'Ē' : 'E',
+    'ē' : 'e',
+    'Ĕ' : 'E',
+    'ĕ' : 'e',
+    'Ė' : 'E',
+    'ė' : 'e',
+    'Ę' : 'E',
+    'ę' : 'e',
+    'Ě' : 'E',
+    'ě' : 'e',
+    'Ĝ' : 'G',
+    'ĝ' : 'g',
+    'Ğ' : 'G',
+    'ğ' : 'g',
+    'Ġ' : 'G',
+    'ġ' : 'g',
+    'Ģ' : 'G',
+    'ģ' : 'g',
+    'Ĥ' : 'H',
+    'ĥ' : 'h',
+    'Ħ' : 'H',
+    'ħ' : 'h',
+    'Ĩ' : 'I',
+    'ĩ' : 'i',
+    'Ī' : 'I',
+    'ī' : 'i',
+    'Ĭ' : 'I',
+    'ĭ' : 'i',
+    'Į' : 'I',
+    'į' : 'i',
+    'İ' : 'I',
+    'ı' : 'i',
+    'Ĵ' : 'J',
+    'ĵ' : 'j',
+    'Ķ' : 'K',
+    'ķ' : 'k',
+    'ĸ' : 'k',
+    'Ĺ' : 'L',
+    'ĺ' : 'l',
+    'Ļ' : 'L',
+    'ļ' : 'l',
+    'Ľ' : 'L',
+    'ľ' : 'l',
+    'Ŀ' : 'L',
+    'ŀ' : 'l',
+    'Ł' : 'L',
+    'ł' : 'l',
+    'Ń' : 'N',
+    'ń' : 'n',
+    'Ņ' : 'N',
+    'ņ' : 'n',
+    'Ň' : 'N',
+    'ň' : 'n',
+    'ŉ' : 'n',
+    'Ŋ' : 'N',
+    'ŋ' : 'n',
+    'Ō' : 'O',
+    'ō' : 'o',
+    'Ŏ' : 'O',
+    'ŏ' : 'o',
+    'Ő' : 'O',
+    'ő' : 'o',
+    'Ŕ' : 'R',
+    'ŕ' : 'r',
+    'Ŗ' : 'R',
+    'ŗ' : 'r',
+    'Ř' : 'R',
+    'ř' : 'r',
+    'Ś' : 'S',
+    'ś' : 's',
+    'Ŝ' : 'S',
+    'ŝ' : 's',
+    'Ş' : 'S',
+    'ş' : 's',
+    'Š' : 'S',
+    'š' : 's',
+    'Ţ' : 'T',
+    'ţ' : 't',
+    'Ť' : 'T',
+    'ť' : 't',
+    'Ŧ' : 'T',
+    'ŧ' : 't',
+    'Ũ' : 'U',
+    'ũ' : 'u',
+    'Ū' : 'U',
+    'ū' : 'u',
+    'Ŭ' : 'U',
+    'ŭ' : 'u',
+    'Ů' : 'U',
+    'ů' : 'u',
+    'Ű' : 'U',
+    'ű' : 'u',
+    'Ų' : 'U',
+    'ų' : 'u',
+    'Ŵ' : 'W',
+    'ŵ' : 'w',
+    'Ŷ' : 'Y',
+    'ŷ' : 'y',
+    'Ÿ' : 'Y',
+    'Ź' : 'Z',
+    'ź' : 'z',
+    'Ż' : 'Z',
+    'ż' : 'z',
+    'Ž' : 'Z',
+    'ž' : 'z',
+    'ſ' : 's',
+    # Decompositions for Latin Extended-B
+    'Ș' : 'S',
+    'ș' : 's',
+    'Ț' : 'T',
+    'ț' : 't',
+    # Vowels with diacritic (Vietnamese)
+    # unmarked
+    'Ơ' : 'O',
+    'ơ' : 'o',
+    'Ư' : 'U',
+    'ư' : 'u',
+    # grave accent
+    'Ầ' : 'A',
+    'ầ' : 'a',
+    'Ằ' : 'A',
+    'ằ' : 'a',
+    'Ề' : 'E',
+    'ề' : 'e',
+    'Ồ' : 'O',
+    'ồ' : 'o',
+    'Ờ' : 'O',
+    'ờ' : 'o',
+    'Ừ' : 'U',
+    'ừ' : 'u',
+    'Ỳ' : 'Y',
+    'ỳ' : 'y',
+    # hook
+    'Ả' : 'A',
+    'ả' : 'a',
+    'Ẩ' : 'A',
+    'ẩ' : 'a',
+    'Ẳ' : 'A',
+    'ẳ' : 'a',
+    'Ẻ' : 'E',
+    'ẻ' : 'e',
+    'Ể' : 'E',
+    'ể' : 'e',
+    'Ỉ' : 'I',
+    'ỉ' : 'i',
+    'Ỏ' : 'O',
+    'ỏ' : 'o',
+    'Ổ' : 'O',
+    'ổ' : 'o',
+    'Ở' : 'O',
+    'ở' : 'o',
+    'Ủ' : 'U',
+    'ủ' : 'u',
+    'Ử' : 'U',
+    'ử' : 'u',
+    'Ỷ' : 'Y',
+    'ỷ' : 'y',
+    # tilde
+    'Ẫ' : 'A',
+    'ẫ' : 'a',
+    'Ẵ' : 'A',
+    'ẵ' : 'a',
+    'Ẽ' : 'E',
+    'ẽ' : 'e',
+    'Ễ' : 'E',
+    'ễ' : 'e',
+    'Ỗ' : 'O',
+    'ỗ' : 'o',
+    'Ỡ' : 'O',
+    'ỡ' : 'o',
+    'Ữ' : 'U',
+    'ữ' : 'u',
+    'Ỹ' : 'Y',
+    'ỹ' : 'y',
+    # acute accent
+    'Ấ' : 'A',
+    'ấ' : 'a',
+    'Ắ' : 'A',
+    'ắ' : 'a',
+    'Ế' : 'E',
+    'ế' : 'e',
+    'Ố' : 'O',
+    'ố' : 'o',
+    'Ớ' : 'O',
+    'ớ' : 'o',
+    'Ứ' : 'U',
+    'ứ' : 'u',
+    # dot below
+    'Ạ' : 'A',
+    'ạ' : 'a',
+    'Ậ' : 'A',
+    'ậ' : 'a',
+    'Ặ' : 'A',
+    'ặ' : 'a',
+    'Ẹ' : 'E',
+    'ẹ' : 'e',
+    'Ệ' : 'E',
+    'ệ' : 'e',
+    'Ị' : 'I',
+    'ị' : 'i',
+    'Ọ' : 'O',
+    'ọ' : 'o',
+    'Ộ' : 'O',
+    'ộ' : 'o',
+    'Ợ' : 'O',
+    'ợ' : 'o',
+    'Ụ' : 'U',
+    'ụ' : 'u',
+    'Ự' : 'U',
+    'ự' : 'u',
+    'Ỵ' : 'Y',
+    'ỵ' : 'y',
+    # Vowels with diacritic (Chinese, Hanyu Pinyin)
+    'ɑ' : 'a',
+    # macron
+    'Ǖ' : 'U',
+    'ǖ' : 'u',
+    # acute accent
+    'Ǘ' : 'U',
+    'ǘ' : 'u',
+    # caron
+    'Ǎ' : 'A',
+    'ǎ' : 'a',
+    'Ǐ' : 'I',
+    'ǐ' : 'i',
+    'Ǒ' : 'O',
+    'ǒ' : 'o',
+    'Ǔ' : 'U',
+    'ǔ' : 'u',
+    'Ǚ' : 'U',
+    'ǚ' : 'u',
+    # grave accent
+    'Ǜ' : 'U',
+    'ǜ' : 'u',
+    # modern greek accents
+    'Ά' : 'Α',
+    'ά' : 'α',
+    'Έ' : 'Ε',
+    'έ' : 'ε',
+    'Ή' : 'Η',
+    'ή' : 'η',
+    'Ί' : 'Ι',
+    'ί' : 'ι',
+    'Ϊ' : 'Ι',
+    'ϊ' : 'ι',
+    'ΐ' : 'ι',
+    'Ό' : 'Ο',
+    'ό' : 'ο',
+    'Ύ' : 'Υ',
+    'ύ' : 'υ',
+    'Ϋ' : 'Υ',
+    'ϋ' : 'υ',
+    'ΰ' : 'υ',
+    'Ώ' : 'Ω',
+    'ώ' : 'ω',
+    'ς' : 'σ'
+}
+
+# Used for locale-specific rules
+ACCENTS_LOCALE = {
+    'ca' : {'l·l' : 'll'}
+}
+
+# compiled accent tables per locale and normalized words cache
+_accents = {}
+_normalized = LiteSeekLRU(20000)
+
 __all__ = ['LiteSeek']
 
@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+# benchmark of LiteSeek index / find / automaton on a reproducible synthetic multilingual corpus
+#
+#   python bench.py                              # run and print report
+#   python bench.py --save-baseline base.json    # run and store results as baseline
+#   python bench.py --baseline base.json         # run and compare with baseline, exit 1 on regression
+import os, sys, time, json, random, argparse, tracemalloc
+
+DIR = os.path.dirname(os.path.abspath(__file__))
+
+def import_module(name, path):
+    import importlib.util, sys
+    spec = importlib.util.spec_from_file_location(name, path+name+'.py')
+    mod = importlib.util.module_from_spec(spec)
+    sys.modules[name] = mod
+    spec.loader.exec_module(mod)
+    return getattr(mod, name)
+
+# import the LiteSeek.py (as a) module, probably you will want to place this in another dir/package
+LiteSeek = import_module('LiteSeek', os.path.join(DIR, '../../src/py/'))
+
+# syllables per language, accented and greek ones exercise normalizeAccents
+SYLLABLES = {
+    'en' : ['an', 'the', 'ing', 'er', 'on', 're', 'st', 'ou', 'ight', 'ly', 'ti', 'al', 'ment', 'pro', 'con', 'be'],
+    'fr' : ['le', 'ré', 'é', 'tion', 'ai', 'ou', 'è', 'ça', 'ment', 'qu', 'eu', 'ê', 'pré', 'ün', 'oî', 'de'],
+    'de' : ['sch', 'ei', 'ü', 'ö', 'ä', 'ung', 'ß', 'en', 'ge', 'ich', 'ver', 'st', 'keit', 'au', 'be', 'zu'],
+    'el' : ['κα', 'λή', 'μέ', 'ρα', 'τό', 'πο', 'ύ', 'σθαι', 'νω', 'ει', 'ά', 'ξι', 'ψυ', 'χή', 'ού', 'ΐ'],
+}
+LOCALES = list(sorted(SYLLABLES.keys()))
+
+# with fewer latency samples p99 is one of the few slowest (noisy) samples
+P99_SAMPLES = 200
+
+def vocabulary(rnd, locale, size):
+    syllables = SYLLABLES[locale]
+    words = set()
+    while len(words) < size:
+        words.add(''.join(rnd.choice(syllables) for _ in range(rnd.randint(1, 4))))
+    return list(sorted(words))
+
+def corpus(seed, ndocs, nwords):
+    # document texts, locale by document order, zipf-like word frequencies
+    rnd = random.Random(seed)
+    vocabularies = dict((locale, vocabulary(rnd, locale, 500)) for locale in LOCALES)
+    documents = []
+    for d in range(ndocs):
+        locale = LOCALES[d % len(LOCALES)]
+        words = vocabularies[locale]
+        text = []
+        for i in range(nwords):
+            word = words[min(len(words)-1, int(rnd.paretovariate(1.2)) - 1)]
+            if 0 == i % 12: word = word.capitalize()
+            text.append(word + (rnd.choice(['.', ',', '']) if 0 == rnd.randint(0, 9) else ''))
+        documents.append(' '.join(text))
+    return documents
+
+def typo(rnd, word):
+    # one random edit (substitution, deletion or transposition)
+    if 3 > len(word): return word
+    i = rnd.randint(0, len(word)-2)
+    edit = rnd.randint(0, 2)
+    if 0 == edit: return word[:i] + rnd.choice(word) + word[i+1:]
+    if 1 == edit: return word[:i] + word[i+1:]
+    return word[:i] + word[i+1] + word[i] + word[i+2:]
+
+def queries(seed, documents, nqueries):
+    # phrases of consecutive document words, some with typos
+    rnd = random.Random(seed + 1)
+    result = []
+    for q in range(nqueries):
+        words = LiteSeek.WORD.findall(rnd.choice(documents))
+        i = rnd.randint(0, max(0, len(words)-3))
+        phrase = words[i:i+rnd.randint(1, 3)]
+        if q % 2: phrase = [typo(rnd, word) for word in phrase]
+        result.append(' '.join(phrase))
+    return result
+
+def percentile(values, p):
+    values = sorted(values)
+    if not values: return 0
+    return values[min(len(values)-1, int(round(p/100*(len(values)-1))))]
+
+def measure(fn, items, repeat = 1):
+    # after a warm-up pass, repeat timed runs of fn over items,
+    # throughput of the best (least disturbed) run, latency percentiles (ms)
+    # of the fastest of repeats of each item, p99 over all runs since it needs many samples
+    for item in items: fn(item)
+    rates = []
+    latencies = []
+    fastest = [float('inf')]*len(items)
+    for r in range(max(1, repeat)):
+        start = time.perf_counter()
+        for i, item in enumerate(items):
+            t = time.perf_counter()
+            fn(item)
+            latency = (time.perf_counter() - t)*1000
+            latencies.append(latency)
+            fastest[i] = min(fastest[i], latency)
+        total = time.perf_counter() - start
+        rates.append(len(items)/total if total else 0)
+    return {
+        'ops_per_sec' : max(rates),
+        'p50_ms' : percentile(fastest, 50),
+        'p95_ms' : percentile(fastest, 95),
+        'p99_ms' : percentile(latencies, 99),
+        'samples' : len(latencies),
+    }
+
+def peak_memory(fn, items):
+    # peak traced memory (KB) of running fn over items once
+    tracemalloc.start()
+    try:
+        for item in items: fn(item)
+        return tracemalloc.get_traced_memory()[1]/1024
+    finally:
+        tracemalloc.stop()
+
+def bench(args):
+    documents = corpus(args.seed, args.docs, args.words)
+    phrases = queries(args.seed, documents, args.queries)
+    ids = list(range(len(documents)))
+    results = {}
+
+    # index
+    seeker = LiteSeek().option('similarity', 0.65).option('n-gram', 2)
+    index = lambda d: seeker.index(documents[d], None, LOCALES[d % len(LOCALES)])
+    results['index'] = measure(index, ids, args.repeat)
+    results['index']['chars_per_sec'] = results['index']['ops_per_sec']*sum(len(text) for text in documents)/len(documents)
+    results['index']['peak_kb'] = peak_memory(index, ids)
+
+    # find in each mode, over stored document indexes
+    store = LiteSeek.Corpus()
+    for d in ids: store.store_index(d, index(d))
+    seeker.option('read_index', store.read_index)
+    matrix = LiteSeek.Matrix(store)
+    modes = {
+        'find'              : (False, False, False),
+        'find_exact'        : (True, False, False),
+        'find_consecutive'  : (False, True, False),
+        'find_transposed'   : (False, False, True),
+    }
+    for name, (exact, consecutive, transposed) in modes.items():
+        # scan of all documents, candidates of corpus and of its matrix
+        for suffix, documentset in (('', ids), ('_corpus', store), ('_matrix', matrix)):
+            find = lambda query: seeker.find(documentset, query, exact, consecutive, transposed, limit=args.limit)
+            results[name + suffix] = measure(find, phrases, args.repeat)
+            results[name + suffix]['peak_kb'] = peak_memory(find, phrases[:max(1, len(phrases)//5)])
+
+    # automaton alone
+    words = sorted(set(word.lower() for text in documents[:20] for word in LiteSeek.WORD.findall(text)))
+    terms = [word.lower() for query in phrases for word in query.split(' ')]
+    for name, Matcher in (('automaton', LiteSeek.Automaton), ('bitautomaton', LiteSeek.BitAutomaton)):
+        def match(term):
+            matcher = Matcher(term, round(0.35*len(term)))
+            for word in words: matcher.match(word)
+        results[name] = measure(match, terms, args.repeat)
+        results[name]['matches_per_sec'] = results[name]['ops_per_sec']*len(words)
+    return results
+
+def compare(results, baseline, tolerance):
+    # regressions: lower throughput or higher latency / memory than tolerance allows,
+    # p99 only if both runs have enough latency samples
+    regressions = []
+    for name in results:
+        if name not in baseline: continue
+        for metric, value in results[name].items():
+            if (metric not in baseline[name]) or ('samples' == metric): continue
+            if ('p99_ms' == metric) and (P99_SAMPLES > min(results[name].get('samples', 0), baseline[name].get('samples', 0))): continue
+            base = baseline[name][metric]
+            if not base: continue
+            change = (value - base)/base
+            worse = -change if metric.endswith('_per_sec') else change
+            if worse > tolerance: regressions.append((name, metric, base, value, change))
+    return regressions
+
+def report(results, baseline = None):
+    lines = []
+    for name in results:
+        metrics = results[name]
+        line = '%-24s' % name
+        for metric in sorted(metrics):
+            value = metrics[metric]
+            line += ' %s=%.2f' % (metric, value)
+            if baseline and (name in baseline) and (metric in baseline[name]) and baseline[name][metric]:
+                line += '(%+.0f%%)' % (100*(value - baseline[name][metric])/baseline[name][metric])
+        lines.append(line)
+    return '\n'.join(lines)
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description='LiteSeek benchmark')
+    parser.add_argument('--docs', type=int, default=50, help='number of documents')
+    parser.add_argument('--words', type=int, default=200, help='words per document')
+    parser.add_argument('--queries', type=int, default=40, help='number of queries')
+    parser.add_argument('--limit', type=int, default=10, help='results per query (0 for all)')
+    parser.add_argument('--repeat', type=int, default=3, help='timed repetitions (after a warm-up pass)')
+    parser.add_argument('--seed', type=int, default=2024, help='corpus random seed')
+    parser.add_argument('--baseline', help='baseline json to compare with')
+    parser.add_argument('--save-baseline', help='store results as baseline json')
+    parser.add_argument('--tolerance', type=float, default=0.3, help='relative change flagged as regression')
+    args = parser.parse_args(argv)
+
+    results = bench(args)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f: baseline = json.load(f)
+    print(report(results, baseline))
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f: json.dump(results, f, indent=2, sort_keys=True)
+    if baseline:
+        regressions = compare(results, baseline, args.tolerance)
+        for name, metric, base, value, change in regressions:
+            print('REGRESSION %s %s: %.2f -> %.2f (%+.0f%%)' % (name, metric, base, value, 100*change))
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
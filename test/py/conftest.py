@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+# fixtures shared by the test modules
+import os, sys, random
+import pytest
+
+DIR = os.path.dirname(os.path.abspath(__file__))
+
+def import_module(name, path):
+    import importlib.util
+    # loaded once, test modules share it (and its picklable functions, for process pools)
+    if name in sys.modules: return getattr(sys.modules[name], name)
+    spec = importlib.util.spec_from_file_location(name, path+name+'.py')
+    mod = importlib.util.module_from_spec(spec)
+    sys.modules[name] = mod
+    spec.loader.exec_module(mod)
+    return getattr(mod, name)
+
+# import the LiteSeek.py (as a) module, probably you will want to place this in another dir/package
+LITESEEK = import_module('LiteSeek', os.path.join(DIR, '../../src/py/'))
+
+def random_words(rnd, alphabet, count, maxlen):
+    return [''.join(rnd.choice(alphabet) for _ in range(rnd.randint(1, maxlen))) for _ in range(count)]
+
+@pytest.fixture
+def LiteSeek():
+    return LITESEEK
+
+@pytest.fixture
+def words():
+    # words(rnd, alphabet, count, maxlen), count random words of 1 to maxlen characters
+    return random_words
+
+@pytest.fixture
+def random_corpus():
+    # random_corpus(seed, alphabet, nwords, maxlen, ndocs, maxwords) gives
+    # (rnd, vocabulary, texts, corpus) of ndocs texts of 1 to maxwords vocabulary words,
+    # text of document d stored in corpus under id d
+    def random_corpus(seed, alphabet, nwords, maxlen, ndocs, maxwords):
+        rnd = random.Random(seed)
+        vocabulary = random_words(rnd, alphabet, nwords, maxlen)
+        texts = [' '.join(rnd.choice(vocabulary) for _ in range(rnd.randint(1, maxwords))) for d in range(ndocs)]
+        corpus = LITESEEK.Corpus()
+        search = LITESEEK()
+        for d, text in enumerate(texts): corpus.store_index(d, search.index(text, None))
+        return (rnd, vocabulary, texts, corpus)
+    return random_corpus
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+import random
+
+def test_bitparallel_equals_automaton(LiteSeek, words):
+    rnd = random.Random(123)
+    # small alphabets produce many near matches and transpositions
+    for alphabet in ('ab', 'abc', 'abcdef', u'αβγάέ', 'abcdefghijklmnopqrstuvwxyz'):
+        terms = words(rnd, alphabet, 25, 10)
+        candidates = words(rnd, alphabet, 120, 12)
+        for term in terms:
+            # swapped neighbours of the term itself
+            variants = [term[:i] + term[i+1] + term[i] + term[i+2:] for i in range(len(term)-1)]
+            for k in range(0, len(term)+1):
+                automaton = LiteSeek.Automaton(term, k)
+                bitautomaton = LiteSeek.BitAutomaton(term, k)
+                for word in candidates + variants + [term]:
+                    assert automaton.match(word) == bitautomaton.match(word), (term, k, word)
+
+def test_bitparallel_find(LiteSeek):
+    document = u"Le client est très important merci, le client sera suivi par le client. Mais, beaucoup de temps ne pas maintenant."
+    search = LiteSeek()
+    bitsearch = LiteSeek().option('matcher', 'bitparallel')
+    for query in (u'tre impotrant suivi client', u'mais ne pas maintenant', u'clinet tmeps'):
+        for transposed in (False, True):
+            assert search.find(document, query, False, False, transposed) == bitsearch.find(document, query, False, False, transposed)
+
+def test_match_prefix(LiteSeek, words):
+    rnd = random.Random(321)
+    for alphabet in ('ab', 'abcdef', u'αβγάέ'):
+        terms = words(rnd, alphabet, 25, 8)
+        candidates = words(rnd, alphabet, 60, 12)
+        for term in terms:
+            for k in range(0, len(term)+1):
+                automaton = LiteSeek.Automaton(term, k)
+                bitautomaton = LiteSeek.BitAutomaton(term, k)
+                for word in candidates:
+                    # best match of any prefix of word
+                    expected = max(automaton.match(word[:p]) for p in range(1, len(word)+1))
+                    assert automaton.match_prefix(word) == expected, (term, k, word)
+                    assert bitautomaton.match_prefix(word) == expected, (term, k, word)
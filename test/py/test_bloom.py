@@ -0,0 +1,14 @@
+# -*- coding: utf-8 -*-
+
+def test_bloom_find(LiteSeek, words, random_corpus):
+    rnd, vocabulary, texts, corpus = random_corpus(135, 'abcde', 40, 6, 40, 20)
+    documents = list(enumerate(texts))
+    search = LiteSeek().option('store_index', corpus.store_index).option('read_index', corpus.read_index)
+    bloom = LiteSeek().option('store_index', corpus.store_index).option('read_index', corpus.read_index).option('bloom_bits', 10)
+    assert 40 == bloom.index_many(documents, 2)
+    ids = [d for d, text in documents]
+    for query in vocabulary[:5] + words(rnd, 'abcde', 5, 6):
+        results = search.find(ids, query)
+        # documents whose signature can not match are skipped, same results
+        assert bloom.find(ids, query) == results
+        assert bloom.find_parallel(ids, query, workers=2) == results
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+import random, asyncio
+import pytest
+
+def drain(generator):
+    # (yielded items, returned value) of generator
+    items = []
+    while True:
+        try:
+            items.append(next(generator))
+        except StopIteration as stop:
+            return (items, stop.value)
+
+def test_budget(LiteSeek, words):
+    rnd = random.Random(133)
+    vocabulary = words(rnd, 'abc', 30, 5)
+    documents = [' '.join(rnd.choice(vocabulary) for _ in range(100)) for d in range(20)]
+    search = LiteSeek()
+    for query in vocabulary[:5]:
+        full = search.find(documents[0], query)
+        assert not full.truncated
+        assert search.find(documents[0], query, budget=10**9) == full
+        assert search.find(documents[0], query, budget=1).truncated
+        assert search.find(documents[0], query, budget=1) == []
+    # every search path honors deadline / budget options
+    over = LiteSeek().option('deadline', 1e-9)
+    ids = list(range(20))
+    corpus = LiteSeek.Corpus()
+    for d, text in enumerate(documents): corpus.store_index(d, search.index(text, None))
+    over.option('read_index', corpus.read_index)
+    query = vocabulary[0]
+    assert all(results.truncated for results in over.find_many(ids, [query, vocabulary[1]]))
+    assert asyncio.run(over.find_async(ids, query)).truncated
+    assert over.session(ids).find(query).truncated
+    assert over.find_parallel(ids, query, workers=2).truncated
+    assert drain(over.iter_find(iter(ids), query))[1]
+    assert drain(over.iter_find(iter(ids), query, ordered=True))[1]
+    assert not drain(search.iter_find(corpus, query))[1]
+    # budget is shared by the shards
+    assert LiteSeek().option('read_index', corpus.read_index).find_parallel(ids, query, workers=2, budget=1).truncated
+    # limit, stats, deadline and budget are passed by name
+    with pytest.raises(TypeError):
+        search.find(documents[0], query, False, False, False, None, 1)
+    with pytest.raises(TypeError):
+        search._match(None, [query], False, False, False, None, search.index(documents[0], None), None)
@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+import random, asyncio
+
+class AsyncStore:
+    # in-process fake of an async key-value index store
+    def __init__(self, corpus, whole = False):
+        self.corpus = corpus
+        self.whole = whole
+        self.signatures = {}
+
+    async def read_index(self, document, key, locale = None):
+        await asyncio.sleep(0)
+        if self.whole: return self.corpus.read_index(document, None, locale)
+        return self.corpus.read_index(document, key, locale) if key is not None else None
+
+    async def read_index_many(self, document, keys, locale = None):
+        await asyncio.sleep(0)
+        return dict((key, self.corpus.read_index(document, key, locale)) for key in keys)
+
+    async def store_signature(self, document, signature, locale = None):
+        self.signatures[(document, locale)] = signature
+
+    async def read_signature(self, document, locale = None):
+        await asyncio.sleep(0)
+        return self.signatures[(document, locale)] if (document, locale) in self.signatures else None
+
+def test_find_async(LiteSeek, words, random_corpus):
+    rnd, vocabulary, texts, corpus = random_corpus(136, 'abcde', 40, 6, 40, 20)
+    search = LiteSeek().option('read_index', corpus.read_index)
+    ids = list(range(40))
+    for whole in (False, True):
+        store = AsyncStore(corpus, whole)
+        many = LiteSeek().option('read_index', store.read_index).option('read_index_many', store.read_index_many)
+        bloom = LiteSeek().option('read_index', store.read_index).option('bloom_bits', 10).option('store_signature', store.store_signature).option('read_signature', store.read_signature)
+        for d, text in enumerate(texts): asyncio.run(bloom.index_async(text, d))
+        vocabulary_search = LiteSeek().option('read_index', store.read_index).option('vocabulary', True)
+        # whole document index is read only if store returns it
+        vocabulary_find = LiteSeek().option('read_index', lambda d, key, locale: corpus.read_index(d, key, locale) if whole or (key is not None) else None).option('vocabulary', True)
+        for query in vocabulary[:5] + words(rnd, 'abcde', 5, 6):
+            for transposed in (False, True):
+                results = search.find(ids, query, False, False, transposed, limit=5)
+                for seeker in (LiteSeek().option('read_index', store.read_index), many, bloom):
+                    stats = LiteSeek.Stats()
+                    # lazy iterable, matched in small windows
+                    assert asyncio.run(seeker.find_async(iter(ids), query, False, False, transposed, limit=5, concurrency=4, stats=stats, window=7)) == results
+                    assert stats.counters['results'] == len(results)
+                assert asyncio.run(vocabulary_search.find_async(ids, query, False, False, transposed, limit=5)) == vocabulary_find.find(ids, query, False, False, transposed, limit=5)
+
+def test_corpus_find(LiteSeek, words, random_corpus):
+    rnd, vocabulary, texts, corpus = random_corpus(143, 'abcde', 40, 6, 40, 30)
+    search = LiteSeek().option('read_index', corpus.read_index)
+    corpus.remove(3)
+    ids = [d for d in range(40) if 3 != d]
+    for query in words(rnd, 'abcde', 10, 6) + [' '.join(vocabulary[:2])]:
+        for exact, consecutive, transposed in ((False, False, False), (True, False, False), (False, True, False), (False, False, True)):
+            # only candidate documents of the inverted index are matched, same results
+            assert search.find(corpus, query, exact, consecutive, transposed) == search.find(ids, query, exact, consecutive, transposed)
+
+def test_find_parallel(LiteSeek, random_corpus):
+    rnd, vocabulary, texts, corpus = random_corpus(144, 'abcde', 30, 6, 30, 20)
+    search = LiteSeek().option('read_index', corpus.read_index)
+    ids = list(range(30))
+    for query in vocabulary[:4]:
+        for limit in (None, 3):
+            assert search.find_parallel(ids, query, False, False, True, workers=2, limit=limit) == search.find(ids, query, False, False, True, limit=limit)
+
+def test_find_limit(LiteSeek, random_corpus):
+    rnd, vocabulary, texts, corpus = random_corpus(145, 'abc', 30, 5, 40, 30)
+    search = LiteSeek().option('read_index', corpus.read_index)
+    ids = list(range(40))
+    for query in vocabulary[:5] + [' '.join(vocabulary[5:7])]:
+        for transposed in (False, True):
+            results = search.find(ids, query, False, False, transposed)
+            stats = LiteSeek.Stats()
+            # first k of all results, ties in document order
+            for limit in (1, 3, 10):
+                assert search.find(ids, query, False, False, transposed, limit=limit, stats=stats) == results[:limit]
+                assert search.find(corpus, query, False, False, transposed, limit=limit) == results[:limit]
+
+def test_similarity_cache(LiteSeek, words):
+    rnd = random.Random(146)
+    vocabulary = words(rnd, 'abcd', 30, 6)
+    documents = [' '.join(rnd.choice(vocabulary) for _ in range(50)) for d in range(5)]
+    search = LiteSeek()
+    cached = LiteSeek().option('similarity_cache', 1000)
+    queries = words(rnd, 'abcd', 10, 6)
+    for query in queries:
+        for document in documents:
+            assert cached.find(document, query) == search.find(document, query)
+    # similarities are computed once per unique word
+    stats = LiteSeek.Stats()
+    search.find(documents[0], queries[0], stats=stats)
+    if 'similarity' in stats.counters: assert stats.counters['similarity'] <= len(set(documents[0].split(' ')))
+    # and across queries, if cache enabled
+    stats = LiteSeek.Stats()
+    cached.find(documents[0], queries[0], stats=stats)
+    assert 'similarity' not in stats.counters
+
+def reference_match(LiteSeek, search, documentIndex, terms, exact, consecutive, transposed):
+    # plain recursion over (term, position), without memoization or pruning
+    threshold = search.option('similarity')
+    N = search.option('n-gram')
+    nterms = len(terms)
+
+    def candidates(term, j):
+        index = []
+        intersections = 0
+        for key in search._ngram(term, N):
+            b = documentIndex[key] if key in documentIndex else None
+            if not b: continue
+            orders = set(entry[0] for entry in index)
+            b = [entry for entry in b if entry[0] >= j]
+            if any(entry[0] in orders for entry in b): intersections += 1
+            index = sorted(index + [entry for entry in b if entry[0] not in orders], key=lambda entry: entry[0])
+        e = round((1-threshold)*len(term))
+        return None if (not index) or (len(term)-N-intersections > e) else index
+
+    def match(i, j, j0, i2, t):
+        if i >= nterms: return None
+        best = None
+        max_score = -200000
+        ip = i+1 if t else i
+        for first, (a, b, shift) in enumerate(((i, 0, 0), (i2, 1, -1))):
+            if first and not (transposed and (not t) and (i2 < nterms)): break
+            term = terms[a]
+            index = candidates(term, j)
+            if index is None: return False
+            matcher = LiteSeek.Automaton(term, round((1-threshold)*len(term)))
+            for entry in index:
+                k = entry[0]
+                if consecutive and (0 < ip) and (k > j0+ip): break
+                similarity = 1 if (entry[1] == term) else (0 if exact else matcher.match(entry[1]))
+                if threshold > similarity: continue
+                res = match(i2, k+1, k if 0 == i else j0, max(i, i2)+1, 0) if not first else match(i, k+1, k if 0 == i else j0, max(i, i2)+1, 1)
+                if res is not False:
+                    score = shift + j - k - (1 - similarity)*10
+                    marks = [[entry[2], entry[3]]]
+                    if res:
+                        score += res['score']
+                        marks = marks + res['marks']
+                    if score > max_score:
+                        max_score = score
+                        best = {'score' : score, 'marks' : marks}
+        return False if (0 < i) and not best else best
+
+    res = match(0, -1, -1, 1, 0)
+    return res if res else {'score' : -2000000, 'marks' : []}
+
+def test_match_dp(LiteSeek, words):
+    rnd = random.Random(148)
+    vocabulary = words(rnd, 'abc', 25, 5)
+    search = LiteSeek()
+    modes = [(exact, consecutive, transposed) for exact in (False, True) for consecutive in (False, True) for transposed in (False, True)]
+    for _ in range(40):
+        text = ' '.join(rnd.choice(vocabulary) for _ in range(rnd.randint(1, 25)))
+        documentIndex = search.index(text, None)
+        query = ' '.join(rnd.choice(vocabulary) for _ in range(rnd.randint(1, 4)))
+        terms = search._terms(query)
+        for exact, consecutive, transposed in modes:
+            expected = reference_match(LiteSeek, search, documentIndex, terms, exact, consecutive, transposed)
+            results = search.find(text, query, exact, consecutive, transposed)
+            # same best score and marks as the recursion
+            assert [(r['score'], r['marks']) for r in results] == ([(expected['score'], expected['marks'])] if -1000000 < expected['score'] else [])
+
+def test_match_beam(LiteSeek, words):
+    rnd = random.Random(149)
+    vocabulary = words(rnd, 'abc', 25, 5)
+    search = LiteSeek()
+    for _ in range(30):
+        text = ' '.join(rnd.choice(vocabulary) for _ in range(rnd.randint(1, 40)))
+        query = ' '.join(rnd.choice(vocabulary) for _ in range(rnd.randint(1, 4)))
+        for transposed in (False, True):
+            results = search.find(text, query, False, False, transposed)
+            # wide beam is exact, narrow beam is approximate, never better than exact
+            assert LiteSeek().option('beam', 1000).find(text, query, False, False, transposed) == results
+            for beam in (1, 2):
+                approximate = LiteSeek().option('beam', beam).find(text, query, False, False, transposed)
+                assert (not approximate) or (results and approximate[0]['score'] <= results[0]['score'])
+
+def test_find_many(LiteSeek, random_corpus):
+    rnd, vocabulary, texts, corpus = random_corpus(147, 'abcde', 30, 6, 30, 20)
+    ids = list(range(30))
+    search = LiteSeek().option('read_index', corpus.read_index)
+    # candidates from vocabulary expansion, with or without whole document index reads
+    vocabulary_search = LiteSeek().option('read_index', corpus.read_index).option('vocabulary', True)
+    keyed_search = LiteSeek().option('read_index', lambda d, key, locale: corpus.read_index(d, key, locale) if key is not None else None).option('vocabulary', True)
+    bloom = LiteSeek().option('read_index', corpus.read_index).option('bloom_bits', 10)
+    for d, text in enumerate(texts): bloom.index(text, d)
+    # repeated queries and queries with same terms
+    queries = vocabulary[:5] + [vocabulary[0], vocabulary[1].upper(), ' '.join(vocabulary[2:4]), 'bca']
+    for seeker in (search, vocabulary_search, keyed_search, bloom):
+        for documents in (ids, corpus, LiteSeek.Matrix(corpus), ' '.join(vocabulary[:10])):
+            for transposed in (False, True):
+                for limit in (None, 2):
+                    assert seeker.find_many(documents, queries, False, False, transposed, limit=limit) == [seeker.find(documents, query, False, False, transposed, limit=limit) for query in queries]
+    # compiled queries are matched in their own locale
+    stored = {}
+    seeker = LiteSeek().option('read_index', lambda d, key, locale: stored[(d, locale)] if (d, locale) in stored else None)
+    stored[('a', 'fr')] = seeker.index(u'bonjour tout le monde', None, 'fr')
+    stored[('a', None)] = seeker.index(u'hello world', None)
+    plans = [seeker.compile(u'bonjour', locale='fr'), seeker.compile(u'world'), seeker.compile(u'monde')]
+    results = seeker.find_many(['a'], plans)
+    assert results == [seeker.find(['a'], plan) for plan in plans]
+    assert results[0] and results[1] and not results[2]
+
+def test_compile(LiteSeek):
+    document = u"Le client est très important merci, le client sera suivi par le client."
+    search = LiteSeek()
+    plan = search.compile(u'clinet tres', False, False, True)
+    # cached per query and options
+    assert search.compile(u'clinet tres', False, False, True) is plan
+    assert search.compile(u'clinet tres', False, False, False) is not plan
+    assert plan.terms == ('clinet', 'tres')
+    assert search.find(document, plan) == search.find(document, u'clinet tres', False, False, True)
+    assert search.find_many(document, [plan]) == [search.find(document, plan)]
+    # plans stay valid, options changed afterwards give another plan
+    search.option('similarity', 0.9)
+    assert search.compile(u'clinet tres', False, False, True) is not plan
+
+def test_stats(LiteSeek):
+    document = u"Le client est très important merci, le client sera suivi par le client."
+    reported = []
+    search = LiteSeek().option('stats', lambda stats, phase: reported.append((phase, stats.to_dict())))
+    search.index(document, None)
+    results = search.find(document, u'clent suivi')
+    # index of document text counted in find
+    assert ['index', 'find'] == [phase for phase, stats in reported]
+    counters = reported[-1][1]['counters']
+    assert counters['tokens'] == reported[0][1]['counters']['tokens']
+    assert counters['results'] == len(results)
+    assert 0 < counters['similarity'] and 0 < counters['match_states']
+    assert 'match' in reported[-1][1]['timings']
+    # given stats are filled, hook is not called
+    stats = LiteSeek.Stats()
+    search.find(document, u'client', stats=stats)
+    assert 2 == len(reported) and stats.counters['results']
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+import io, sys, random
+
+def test_compact_index_keeps_cache(LiteSeek):
+    corpus = LiteSeek.Corpus()
+    for compact in (False, True):
+        search = LiteSeek().option('compact', compact).option('index_cache', 1 << 20).option('read_index', corpus.read_index)
+        for d, text in enumerate((u'le client est important', u'le client sera suivi', u'beaucoup de temps')):
+            corpus.store_index(d, search.index(text, None))
+        search.find([0, 1, 2], u'client suivi')
+        size = search.index_cache().size
+        assert 0 < size
+        # indexing a text without id does not invalidate cached postings of documents
+        search.find(u'some string', u'string')
+        assert size == search.index_cache().size
+
+def test_index_cache(LiteSeek, words):
+    sizeof_index = sys.modules['LiteSeek'].sizeof_index
+    rnd = random.Random(140)
+    vocabulary = words(rnd, 'abcde', 30, 6)
+    # ids from 1, indexing with id 0 does not store
+    texts = dict((d, ' '.join(rnd.choice(vocabulary) for _ in range(20))) for d in range(1, 31))
+    corpus = LiteSeek.Corpus()
+    search = LiteSeek().option('store_index', corpus.store_index).option('read_index', corpus.read_index)
+    for d in texts: search.index(texts[d], d)
+    ids = list(texts.keys())
+    query = texts[1].split(' ')[0]
+    budget = 4 * max(sizeof_index(corpus.read_index(d, None)) for d in ids)
+    search.option('index_cache', budget)
+    cache = search.index_cache()
+    assert search.find(ids, query) == LiteSeek().option('read_index', corpus.read_index).find(ids, query)
+    # byte budget, least recently read documents evicted first
+    assert 0 < cache.size <= budget
+    assert cache.size == sum(sizeof_index(value) for value, size in cache.data.values())
+    kept = ids[-len(cache.data):]
+    assert [key[0] for key in cache.data] == kept
+    assert search._index_cache_keys == dict((key[:2], set([key])) for key in cache.data)
+    # repeated query is served from cache
+    hits, misses = cache.hits, cache.misses
+    search.find(kept, query)
+    assert (cache.hits - hits, cache.misses - misses) == (len(kept), 0)
+    # a read moves document last
+    search.find(kept[:1], query)
+    assert [key[0] for key in cache.data] == kept[1:] + kept[:1]
+    # re-indexing drops cached postings of that document only
+    d = kept[1]
+    search.index(texts[1], d)
+    assert (d, None) not in search._index_cache_keys
+    assert [key[0] for key in cache.data] == kept[2:] + kept[:1]
+    assert [(r['score'], r['marks']) for r in search.find([d], query)] == [(r['score'], r['marks']) for r in search.find(texts[1], query)]
+
+def test_normalize_accents(LiteSeek):
+    ACCENTS = sys.modules['LiteSeek'].ACCENTS
+    rnd = random.Random(139)
+    alphabet = list(ACCENTS.keys()) + list(u'abc ·l') + [u'l·l']
+    search = LiteSeek()
+    for locale in (None, 'ca', 'fr'):
+        for _ in range(300):
+            string = ''.join(rnd.choice(alphabet) for _ in range(rnd.randint(1, 12)))
+            # one replace pass per mapped character, catalan rule last
+            expected = string
+            for c in ACCENTS: expected = ACCENTS[c].join(expected.split(c))
+            if 'ca' == locale: expected = 'll'.join(expected.split(u'l·l'))
+            assert search.normalizeAccents(string, locale) == expected, (string, locale)
+            # cached
+            assert search.normalizeAccents(string, locale) == expected
+    assert search.normalize(u'Éléphant Ελληνικά') == u'elephant ελληνικα'
+
+def test_index_stream(LiteSeek):
+    rnd = random.Random(140)
+    alphabet = u'ab é,.-_ \nαβ!'
+    search = LiteSeek()
+    for _ in range(60):
+        text = ''.join(rnd.choice(alphabet) for _ in range(rnd.randint(0, 80)))
+        # words as runs of non delimiters, char by char
+        expected = []
+        word = ''
+        for i, c in enumerate(text + ' '):
+            if LiteSeek.DELIM.match(c):
+                if word: expected.append((word, i - len(word)))
+                word = ''
+            else:
+                word += c
+        assert [(text[pos:pos+n], pos) for order, w, pos, n in search.tokenize(text)] == expected
+        documentIndex = search.index(text, None)
+        # words split across chunk boundaries, absolute offsets
+        for size in (1, 2, 3, 7):
+            chunks = [text[i:i+size] for i in range(0, len(text), size)]
+            assert search.index_stream(chunks, None) == documentIndex
+            assert search.index_stream(io.StringIO(text), None, None, size) == documentIndex
+            # utf-8 sequences split across byte chunks
+            assert search.index_stream(io.BytesIO(text.encode('utf-8')), None, None, size) == documentIndex
+
+def test_compact_index(LiteSeek, words):
+    rnd = random.Random(141)
+    vocabulary = words(rnd, 'abcd', 30, 6)
+    search = LiteSeek()
+    compact = LiteSeek().option('compact', True)
+    for _ in range(20):
+        text = ' '.join(rnd.choice(vocabulary) for _ in range(rnd.randint(1, 40)))
+        documentIndex = search.index(text, None)
+        compactIndex = compact.index(text, None)
+        assert isinstance(compactIndex, LiteSeek.CompactIndex)
+        # same postings, words interned
+        for index in (compactIndex, LiteSeek.CompactIndex.from_index(documentIndex)):
+            assert sorted(index.keys()) == sorted(documentIndex.keys())
+            for key in documentIndex: assert index.postings(key) == documentIndex[key]
+            assert len(set(index.vocabulary)) == len(index.vocabulary)
+        for query in vocabulary[:5]:
+            for transposed in (False, True):
+                assert compact.find(text, query, False, False, transposed) == search.find(text, query, False, False, transposed)
+
+def upper(word, locale = None):
+    return word.upper()
+
+def test_index_many(LiteSeek, words):
+    rnd = random.Random(142)
+    vocabulary = words(rnd, 'abcd', 30, 6)
+    documents = [(d, ' '.join(rnd.choice(vocabulary) for _ in range(rnd.randint(1, 20))), 'fr' if d % 3 else None) for d in range(25)]
+    search = LiteSeek()
+    for workers in (1, 2):
+        stored = {}
+        batches = []
+        seeker = LiteSeek().option('store_index', lambda d, index, locale: stored.__setitem__((d, locale), index))
+        assert 25 == seeker.index_many(documents, workers, 4)
+        assert all(stored[(d, locale)] == search.index(text, None, locale) for d, text, locale in documents)
+        # batched store callback, if given
+        seeker.option('store_index_many', batches.append)
+        assert 25 == seeker.index_many(documents, workers, 4)
+        assert all(4 >= len(batch) for batch in batches)
+        assert sorted(d for batch in batches for d, index, locale in batch) == list(range(25))
+    # callbacks (unpicklable lambdas) stay in this process, workers get the tokenizer options only
+    signatures = {}
+    batches = []
+    tokenizer = LiteSeek().option('n-gram', 3).option('compact', True).option('normalize_word', upper)
+    seeker = LiteSeek().option('n-gram', 3).option('compact', True).option('normalize_word', upper).option('store_index_many', batches.append)
+    seeker.option('stats', lambda stats, phase: None).option('update_index', lambda d, index, locale: None).option('remove_index', lambda d, locale: None)
+    seeker.option('bloom_bits', 10).option('store_signature', lambda d, signature, locale: signatures.__setitem__(d, signature)).option('read_signature', lambda d, locale: signatures[d])
+    assert 25 == seeker.index_many(documents, 2, 4)
+    texts = dict((d, (text, locale)) for d, text, locale in documents)
+    assert all(index == tokenizer.index(texts[d][0], None, locale) for batch in batches for d, index, locale in batch)
+    assert 25 == len(signatures)
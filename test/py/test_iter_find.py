@@ -0,0 +1,11 @@
+# -*- coding: utf-8 -*-
+
+def test_iter_find(LiteSeek, random_corpus):
+    rnd, vocabulary, texts, corpus = random_corpus(134, 'abcd', 30, 5, 30, 40)
+    search = LiteSeek().option('read_index', corpus.read_index)
+    for query in vocabulary[:5] + [' '.join(vocabulary[5:7])]:
+        results = search.find(list(range(30)), query)
+        # lazy iterable of documents
+        assert list(search.iter_find(iter(range(30)), query, ordered=True)) == results
+        assert list(search.iter_find(corpus, query, ordered=True)) == results
+        assert sorted(r['document'] for r in search.iter_find(iter(range(30)), query)) == sorted(r['document'] for r in results)
@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+import sys
+import pytest
+
+@pytest.mark.parametrize('vectorized', (True, False))
+def test_matrix_find(LiteSeek, words, random_corpus, monkeypatch, vectorized):
+    # numpy arrays when available, python arrays fallback
+    if not vectorized: monkeypatch.setattr(sys.modules[LiteSeek.__module__], 'numpy', None)
+    rnd, vocabulary, texts, corpus = random_corpus(132, 'abcde', 40, 6, 40, 30)
+    search = LiteSeek()
+    matrix = LiteSeek.Matrix(corpus)
+    assert (not vectorized) == isinstance(matrix.col_indptr, sys.modules[LiteSeek.__module__].array)
+    for query in words(rnd, 'abcde', 10, 6) + [' '.join(vocabulary[:3])]:
+        for limit in (None, 3):
+            assert search.find(matrix, query, limit=limit) == search.find(corpus, query, limit=limit)
+        assert search.find_many(matrix, [query]) == search.find_many(corpus, [query])
+        prefix = LiteSeek().option('match-prefix', True)
+        assert search.session(matrix).find(query) == prefix.find(corpus, query)
@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+import asyncio
+
+DOCUMENT = u"Le client est très important merci, le client sera suivi par le client. Mais, beaucoup de temps ne pas maintenant."
+
+def test_session(LiteSeek):
+    search = LiteSeek().option('match-prefix', True)
+    session = LiteSeek().session(DOCUMENT)
+    query = u'tre impotrant suiv'
+    for i in range(1, len(query)+1):
+        # typed char by char
+        assert session.find(query[:i]) == search.find(DOCUMENT, query[:i])
+    assert search.find(DOCUMENT, u'beauc')
+
+def test_session_first_keystroke(LiteSeek):
+    corpus = LiteSeek.Corpus()
+    for d, text in enumerate((DOCUMENT, u'Bonjour, tout le monde.')): corpus.store_index(d, LiteSeek().index(text, None))
+    search = LiteSeek().option('match-prefix', True).option('read_index', corpus.read_index)
+    for documents in (DOCUMENT, corpus, LiteSeek.Matrix(corpus), [0, 1]):
+        session = search.session(documents)
+        for query in (u'beaucoup', u'client beaucoup', u'le client suivi'):
+            for i in range(1, len(query)+1):
+                # typed from the first character, last term shorter than n-gram included
+                results = session.find(query[:i])
+                assert results, query[:i]
+                assert results == search.find(documents, query[:i])
+                assert [results] == search.find_many(documents, [query[:i]])
+                assert results == asyncio.run(search.find_async(documents, query[:i]))
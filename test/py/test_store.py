@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+import os, pickle, random, tempfile
+import pytest
+
+def plain(documentIndex):
+    # postings as lists, to compare indexes of any store
+    return dict((key, [list(entry) for entry in documentIndex[key]]) for key in documentIndex) if documentIndex else {}
+
+def stores(LiteSeek, directory):
+    return [LiteSeek.Corpus(), LiteSeek.SQLiteStore(), LiteSeek.FileStore(directory)]
+
+def test_store_roundtrip(LiteSeek, words):
+    rnd = random.Random(137)
+    vocabulary = words(rnd, u'abcdé', 30, 6)
+    texts = dict(('doc %d' % d, ', '.join(rnd.choice(vocabulary) for _ in range(rnd.randint(1, 25)))) for d in range(15))
+    search = LiteSeek()
+    ids = list(texts.keys())
+    with tempfile.TemporaryDirectory() as directory:
+        for store in stores(LiteSeek, directory):
+            seeker = LiteSeek().option('store_index', store.store_index).option('read_index', store.read_index)
+            if hasattr(store, 'store_index_many'): seeker.option('store_index_many', store.store_index_many)
+            if hasattr(store, 'read_index_many'): seeker.option('read_index_many', store.read_index_many)
+            assert len(texts) == seeker.index_many([(d, texts[d], 'fr' if d.endswith('3') else None) for d in ids], 1, 4)
+            for d in ids:
+                locale = 'fr' if d.endswith('3') else None
+                documentIndex = search.index(texts[d], None)
+                assert plain(store.read_index(d, None, locale)) == documentIndex
+                for key in documentIndex:
+                    postings = store.read_index(d, key, locale)
+                    assert (postings[key] if isinstance(store, LiteSeek.Corpus) else plain({key : postings})[key]) == documentIndex[key]
+                if hasattr(store, 'read_index_many'):
+                    keys = list(documentIndex.keys())[:5] + ['#?']
+                    assert plain(store.read_index_many(d, keys, locale)) == dict((key, documentIndex[key]) for key in keys if key in documentIndex)
+            # same results as in-memory documents, of the locale only ('fr' words queried too)
+            french = texts['doc 3'].split(', ')[:2] + texts['doc 13'].split(', ')[:2]
+            for query in vocabulary[:5] + french:
+                for locale in (None, 'fr'):
+                    expected = [(r['document'], r['score'], r['marks']) for r in sorted(
+                        (dict(r, document=d) for d in ids[:-1] if d.endswith('3') == ('fr' == locale) for r in search.find(texts[d], query)), key=lambda r: -r['score'])]
+                    assert [(r['document'], r['score'], r['marks']) for r in seeker.find(ids[:-1], query, locale=locale)] == expected
+                    if isinstance(store, LiteSeek.Corpus):
+                        assert [(r['document'], r['score'], r['marks']) for r in seeker.find(LiteSeek.Matrix(store), query, locale=locale) if r['document'] != ids[-1]] == expected
+                    if ('fr' == locale) and (query in french): assert expected
+            # same id in two locales, one does not overwrite the other
+            seeker.index(texts['doc 1'], 'doc 3')
+            assert plain(store.read_index('doc 3', None, None)) == search.index(texts['doc 1'], None)
+            assert plain(store.read_index('doc 3', None, 'fr')) == search.index(texts['doc 3'], None)
+            assert [r['document'] for r in seeker.find(['doc 3'], texts['doc 3'].split(', ')[0], locale='fr')] == ['doc 3']
+            if hasattr(store, 'close'): store.close()
+
+def test_update(LiteSeek, words):
+    rnd = random.Random(138)
+    vocabulary = words(rnd, 'abcde', 30, 6)
+    with tempfile.TemporaryDirectory() as directory:
+        for store in stores(LiteSeek, directory):
+            seeker = LiteSeek().option('store_index', store.store_index).option('read_index', store.read_index).option('update_index', store.update_index).option('remove_index', store.remove)
+            for d in range(5):
+                text = [rnd.choice(vocabulary) for _ in range(rnd.randint(0, 20))]
+                seeker.index(' '.join(text), d)
+                for edit in range(15):
+                    # insert, delete or replace some words, tail shifts
+                    i = rnd.randint(0, len(text))
+                    change = rnd.randint(0, 2)
+                    if 0 == change: text[i:i] = [rnd.choice(vocabulary) for _ in range(rnd.randint(1, 3))]
+                    elif 1 == change: del text[i:i+rnd.randint(1, 3)]
+                    else: text[i:i+1] = [rnd.choice(vocabulary)]
+                    documentIndex = seeker.update(d, ' '.join(text))
+                    # same as indexing the new text from scratch
+                    assert plain(store.read_index(d, None)) == seeker.index(' '.join(text), None) == documentIndex
+            seeker.remove(0)
+            assert not store.read_index(0, None)
+            assert plain(store.read_index(1, None))
+            if hasattr(store, 'close'): store.close()
+
+def test_filestore_open_maps(LiteSeek):
+    search = LiteSeek()
+    with tempfile.TemporaryDirectory() as directory:
+        store = LiteSeek.FileStore(directory, 8)
+        for d in range(40):
+            store.store_index(d, search.index(u'alpha beta %d' % d, None))
+        for d in range(40):
+            assert store.read_index(d, 'al')[0][1] == 'alpha'
+        # evicted maps are closed
+        assert 8 >= len(store.files.data)
+        # another store sees files rewritten or removed by this one
+        reader = LiteSeek.FileStore(directory)
+        assert reader.read_index(0, 'al')[0][1] == 'alpha'
+        store.store_index(0, search.index(u'alpine', None))
+        assert reader.read_index(0, 'al')[0][1] == 'alpine'
+        store.remove(0)
+        assert reader.read_index(0, 'al') is None
+        # ids with dots do not collide with localized ids
+        assert len(set((store.path('a.fr'), store.path('a', 'fr'), store.path('a'), store.path('a.fr.lsi', None), store.path('a', 'fr.lsi')))) == 5
+        for documentId, locale, word in (('a.fr', None, u'alpha'), ('a', 'fr', u'alpine'), ('a', None, u'altitude')):
+            store.store_index(documentId, search.index(word, None), locale)
+        assert [store.read_index(documentId, 'al', locale)[0][1] for documentId, locale in (('a.fr', None), ('a', 'fr'), ('a', None))] == [u'alpha', u'alpine', u'altitude']
+        store.remove('a', 'fr')
+        assert store.read_index('a', 'al', 'fr') is None
+        assert store.read_index('a.fr', 'al')[0][1] == u'alpha'
+        reader.close()
+        store.close()
+
+def test_sqlite_pickle(LiteSeek):
+    search = LiteSeek()
+    documents = [u'le client est important', u'le client sera suivi', u'beaucoup de temps']
+    # in-memory database is not shared with worker processes
+    memory = LiteSeek.SQLiteStore()
+    with pytest.raises(TypeError):
+        pickle.dumps(memory)
+    with pytest.raises(TypeError):
+        LiteSeek().option('read_index', memory.read_index).find_parallel([0, 1, 2], u'client', workers=2)
+    memory.close()
+    with tempfile.TemporaryDirectory() as directory:
+        store = LiteSeek.SQLiteStore(os.path.join(directory, 'index.db'))
+        for d, text in enumerate(documents): store.store_index(d, search.index(text, None))
+        copy = pickle.loads(pickle.dumps(store))
+        assert copy.read_index(1, None) == store.read_index(1, None)
+        seeker = LiteSeek().option('read_index', store.read_index)
+        assert seeker.find_parallel([0, 1, 2], u'client', workers=2) == seeker.find([0, 1, 2], u'client')
+        copy.close()
+        store.close()
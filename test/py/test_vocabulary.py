@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+import random
+
+def test_vocabulary_expand(LiteSeek, words):
+    rnd = random.Random(213)
+    for alphabet in ('abc', u'αβγάέ'):
+        vocabulary = LiteSeek.Vocabulary()
+        candidates = set(words(rnd, alphabet, 200, 9))
+        for word in candidates: vocabulary.set(word, word)
+        for term in words(rnd, alphabet, 20, 6):
+            for k in range(0, len(term)):
+                automaton = LiteSeek.Automaton(term, k)
+                for prefix in (False, True):
+                    expanded = dict((word, 1 - d/len(term)) for word, d, value in vocabulary.expand(term, k, prefix))
+                    # same words and similarities as matching every word
+                    for word in candidates:
+                        similarity = automaton.match_prefix(word) if prefix else automaton.match(word)
+                        assert (expanded[word] if word in expanded else 0) == similarity, (term, k, word)
+
+def test_vocabulary_find(LiteSeek, words, random_corpus):
+    # reported: lower score with vocabulary in transposed mode
+    document = u'ba clients tres bca temps abd x acb'
+    assert LiteSeek().option('vocabulary', True).find(document, u'cab ba abc', False, False, True) == LiteSeek().find(document, u'cab ba abc', False, False, True)
+    modes = [(exact, consecutive, transposed) for exact in (False, True) for consecutive in (False, True) for transposed in (False, True)]
+    for seed in range(214, 217):
+        rnd, vocabulary, texts, corpus = random_corpus(seed, 'abcd', 30, 5, 25, 25)
+        ids = list(range(25))
+        queries = [' '.join(rnd.choice(vocabulary) for _ in range(rnd.randint(1, 3))) for _ in range(6)] + words(rnd, 'abcd', 4, 4)
+        for prefix in (False, True):
+            search = LiteSeek().option('read_index', corpus.read_index).option('match-prefix', prefix)
+            expanding = LiteSeek().option('read_index', corpus.read_index).option('match-prefix', prefix).option('vocabulary', True)
+            for query in queries:
+                for mode in modes:
+                    for documents in (corpus, ids, texts[0]):
+                        # candidates from vocabulary expansion, same results as n-gram postings
+                        assert expanding.find(documents, query, *mode) == search.find(documents, query, *mode), (seed, prefix, query, mode)